@@ -4,7 +4,12 @@ from flask_cors import CORS
 from services.api_service import api_bp
 from services.report_generator import reports_bp
 from utils.config import Config
-from models.database import init_database
+from models.database import init_database, get_pool_stats
+from services.cache_service import response_cache
+from services.cache_warmer import CacheWarmer
+from services.suggest_index import suggest_index
+from models.columnar_engine import columnar_engine
+from services.response_encoding import init_compression
 
 def create_app():
     """Application factory pattern"""
@@ -15,6 +20,7 @@ def create_app():
     
     # Initialize extensions
     CORS(app, origins=['http://localhost:3000'])
+    init_compression(app)
     
     # Initialize database
     init_database()
@@ -25,7 +31,24 @@ def create_app():
     
     @app.route('/health')
     def health_check():
-        return {'status': 'healthy', 'service': 'music-analytics-api'}
+        return {
+            'status': 'healthy',
+            'service': 'music-analytics-api',
+            'database_pool': get_pool_stats(),
+            'response_cache': response_cache.get_stats(),
+            'cache_warming': app.cache_warmer.last_report,
+            'suggest_index': suggest_index.stats(),
+            'analytics_engine': columnar_engine.stats()
+        }
+    
+    # Pre-compute hot responses in the background (once all routes are registered),
+    # then again after each ingestion
+    app.cache_warmer = CacheWarmer(app)
+    if Config.CACHE_WARM_ON_STARTUP:
+        app.cache_warmer.start()
+    
+    if Config.SUGGEST_BUILD_ON_STARTUP:
+        suggest_index.start()
     
     return app
 
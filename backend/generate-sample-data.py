@@ -2,6 +2,8 @@
 import random
 from datetime import datetime, timedelta
 from models.database import get_db_engine
+from models.rollups import rebuild_rollups
+from models.partitions import insert_facts
 from sqlalchemy import text
 
 def generate_sample_data():
@@ -61,27 +63,26 @@ def generate_sample_data():
         countries = ["US", "GB", "CA", "AU", "DE"]
         tracks = ["SAMPLE001", "SAMPLE002", "SAMPLE003", "SAMPLE004", "SAMPLE005"]
         
-        metrics_added = 0
+        sample_metrics = []
         for i in range(2000):  # Generate 2000 sample records
-            date_id = 20240100 + random.randint(1, 365)  # Random date in 2024
-            try:
-                conn.execute(text("""
-                    INSERT INTO fact_music_metrics 
-                    (isrc, platform_id, country_code, date_id, metric_value, metric_type, batch_id, environment)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """), (
-                    random.choice(tracks),
-                    random.choice(platforms), 
-                    random.choice(countries),
-                    date_id,
-                    random.randint(1000, 100000),  # Random streams between 1K-100K
-                    "streams",
-                    "sample_batch",
-                    "dev"
-                ))
-                metrics_added += 1
-            except Exception as e:
-                continue  # Skip errors and continue
+            date = datetime(2024, 1, 1) + timedelta(days=random.randint(0, 365))  # Random date in 2024
+            sample_metrics.append((
+                random.choice(tracks),
+                random.choice(platforms), 
+                random.choice(countries),
+                int(date.strftime('%Y%m%d')),
+                random.randint(1000, 100000),  # Random streams between 1K-100K
+                "streams",
+                "sample_batch",
+                "dev"
+            ))
+        
+        # Rows are routed to their monthly fact partitions
+        metrics_added = insert_facts(conn, ['isrc', 'platform_id', 'country_code', 'date_id', 'metric_value',
+                                            'metric_type', 'batch_id', 'environment'], sample_metrics)
+        
+        # Sample rows bypass the ingestion path, so recompute the rollups
+        rebuild_rollups(conn)
         
         conn.commit()
         print(f"✅ {metrics_added} streaming records added")
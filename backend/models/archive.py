@@ -0,0 +1,226 @@
+# backend/models/archive.py
+import argparse
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+import pandas as pd
+from sqlalchemy import text
+from models.database import FACT_METRIC_COLUMNS, get_db_engine
+from models.partitions import UNDATED, drop_partition, fact_source, list_partitions, partition_table
+from utils.config import Config
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; without it nothing is archived
+    pa = ds = pq = None
+
+# Closed months of fact_music_metrics are written once to Parquet under
+#   <ARCHIVE_DIR>/year=YYYY/month=MM/platform=<platform_id>/part-<first id>-<last id>.parquet
+# and recorded in archive_partitions. Rows later inserted for an archived month
+# (late files) land in a new part. The manifest, not a directory listing, is
+# what readers trust, so a half-written file is never read.
+ARCHIVE_COLUMNS = ['metric_id'] + FACT_METRIC_COLUMNS
+DICTIONARY_COLUMNS = ['isrc', 'country_code', 'platform_id']
+
+def archive_schema():
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    types = {
+        'metric_id': pa.int64(), 'date_id': pa.int64(),
+        'metric_value': pa.float64(), 'data_quality_score': pa.float64()
+    }
+    return pa.schema([(column, dictionary if column in DICTIONARY_COLUMNS else types.get(column, pa.string()))
+                      for column in ARCHIVE_COLUMNS])
+
+def archive_cutoff(hot_months: Optional[int] = None, today: Optional[datetime] = None) -> int:
+    """year_month of the oldest month kept hot; every earlier month is closed"""
+    hot_months = Config.ARCHIVE_HOT_MONTHS if hot_months is None else hot_months
+    today = today or datetime.utcnow()
+    months = today.year * 12 + today.month - 1 - max(hot_months - 1, 0)
+    return (months // 12) * 100 + months % 12 + 1
+
+def partition_dir(year_month: int, platform_id: str) -> str:
+    return os.path.join(f"year={year_month // 100}", f"month={year_month % 100:02d}",
+                        f"platform={platform_id.replace(os.sep, '_')}")
+
+def archive_closed_months(cutoff: Optional[int] = None, prune: Optional[bool] = None, engine=None) -> Dict:
+    """Write not-yet-archived fact rows of months before cutoff to Parquet.
+
+    With prune, archived rows are then deleted from their monthly fact
+    partition (the rollups keep them) and emptied partitions are dropped,
+    which keeps the hot tables and their backups bounded. Platforms with rows
+    of a batch that is still processing are left for the next run. Returns a
+    report of what was written and pruned.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required to archive fact data (pip install pyarrow)")
+
+    engine = engine or get_db_engine()
+    cutoff = cutoff or archive_cutoff()
+    prune = Config.ARCHIVE_PRUNE if prune is None else prune
+    report = {'cutoff': cutoff, 'files': 0, 'rows_archived': 0, 'rows_pruned': 0}
+
+    partitions = []
+    with engine.connect() as conn:
+        for year_month in list_partitions(conn):
+            if year_month == UNDATED or year_month >= cutoff:
+                continue
+            partitions += conn.execute(text(f"""
+                SELECT :year_month, f.platform_id, MIN(f.metric_id), MAX(f.metric_id)
+                FROM {partition_table(year_month)} f
+                WHERE f.metric_id > COALESCE((
+                    SELECT MAX(p.last_metric_id) FROM archive_partitions p
+                    WHERE p.year_month = :year_month AND p.platform_id = f.platform_id
+                ), 0)
+                GROUP BY f.platform_id
+                HAVING MAX(CASE WHEN f.batch_id IN (SELECT batch_id FROM processing_history
+                                                    WHERE processing_status = 'processing')
+                           THEN 1 ELSE 0 END) = 0
+                ORDER BY f.platform_id
+            """), {'year_month': year_month}).fetchall()
+
+    for year_month, platform_id, first_id, last_id in partitions:
+        relative_path, rows = write_partition(engine, year_month, platform_id, first_id, last_id)
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT OR REPLACE INTO archive_partitions
+                    (file_path, year_month, platform_id, first_metric_id, last_metric_id, row_count, file_size_bytes)
+                VALUES (:file_path, :year_month, :platform_id, :first_id, :last_id, :rows, :size)
+            """), {'file_path': relative_path, 'year_month': year_month, 'platform_id': platform_id,
+                   'first_id': first_id, 'last_id': last_id, 'rows': rows,
+                   'size': os.path.getsize(os.path.join(Config.ARCHIVE_DIR, relative_path))})
+        report['files'] += 1
+        report['rows_archived'] += rows
+
+    if prune:
+        report['rows_pruned'] = prune_archived_facts(engine, cutoff)
+
+    print(f"🗄️ Archived {report['rows_archived']} fact rows in {report['files']} Parquet files "
+          f"before {cutoff}, pruned {report['rows_pruned']}")
+    return report
+
+def write_partition(engine, year_month: int, platform_id: str, first_id: int, last_id: int):
+    """Stream one partition's id range into a Parquet file; returns (path relative to ARCHIVE_DIR, rows)"""
+    relative_path = os.path.join(partition_dir(year_month, platform_id),
+                                 f"part-{first_id:012d}-{last_id:012d}.parquet")
+    path = os.path.join(Config.ARCHIVE_DIR, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    schema = archive_schema()
+    rows = 0
+    writer = pq.ParquetWriter(path + '.tmp', schema, compression='zstd', use_dictionary=DICTIONARY_COLUMNS)
+    try:
+        with engine.connect() as conn:
+            chunks = pd.read_sql(text(f"""
+                SELECT {', '.join(ARCHIVE_COLUMNS)} FROM {partition_table(year_month)}
+                WHERE platform_id = :platform_id
+                AND metric_id BETWEEN :first_id AND :last_id
+                ORDER BY metric_id
+            """), conn, params={'platform_id': platform_id, 'first_id': first_id, 'last_id': last_id},
+                chunksize=Config.ARCHIVE_CHUNK_ROWS)
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, preserve_index=False).cast(schema))
+                rows += len(chunk)
+    finally:
+        writer.close()
+
+    os.replace(path + '.tmp', path)
+    return relative_path, rows
+
+def prune_archived_facts(engine=None, cutoff: Optional[int] = None) -> int:
+    """Delete fact rows already recorded in the archive and drop emptied months; returns rows removed"""
+    engine = engine or get_db_engine()
+    cutoff = cutoff or archive_cutoff()
+    removed = 0
+    with engine.begin() as conn:
+        files = conn.execute(text("""
+            SELECT file_path, year_month, platform_id, first_metric_id, last_metric_id
+            FROM archive_partitions
+            WHERE pruned = 0 AND year_month < :cutoff
+        """), {'cutoff': cutoff}).fetchall()
+        existing = set(list_partitions(conn))
+
+        for file_path, year_month, platform_id, first_id, last_id in files:
+            if year_month in existing:
+                removed += conn.execute(text(f"""
+                    DELETE FROM {partition_table(year_month)}
+                    WHERE platform_id = :platform_id
+                    AND metric_id BETWEEN :first_id AND :last_id
+                """), {'platform_id': platform_id, 'first_id': first_id, 'last_id': last_id}).rowcount
+            conn.execute(text("UPDATE archive_partitions SET pruned = 1 WHERE file_path = :file_path"),
+                         {'file_path': file_path})
+
+        for year_month in sorted({row[1] for row in files} & existing):
+            if conn.execute(text(f"SELECT 1 FROM {partition_table(year_month)} LIMIT 1")).fetchone() is None:
+                drop_partition(conn, year_month)
+    return removed
+
+def pruned_files(conn, date_from: Optional[int] = None, date_to: Optional[int] = None,
+                 platform_id: Optional[str] = None) -> List[str]:
+    """Archive files whose rows are no longer in fact_music_metrics, limited to a date_id range"""
+    return [os.path.join(Config.ARCHIVE_DIR, path) for path in conn.execute(text("""
+        SELECT file_path FROM archive_partitions
+        WHERE pruned = 1
+        AND year_month >= COALESCE(:date_from, 0) / 100
+        AND year_month <= COALESCE(:date_to, 99999999) / 100
+        AND (:platform_id IS NULL OR platform_id = :platform_id)
+        ORDER BY file_path
+    """), {'date_from': date_from, 'date_to': date_to, 'platform_id': platform_id}).scalars()]
+
+def iter_archived_facts(conn, date_from: Optional[int] = None, date_to: Optional[int] = None,
+                        platform_id: Optional[str] = None, columns: Optional[List[str]] = None,
+                        batch_size: int = 500000) -> Iterator[pd.DataFrame]:
+    """Pruned fact rows in the date_id range as DataFrames of up to batch_size rows"""
+    files = pruned_files(conn, date_from, date_to, platform_id)
+    if not files:
+        return
+    if pa is None:
+        raise RuntimeError("pyarrow is required to read archived fact data (pip install pyarrow)")
+
+    condition = None
+    if date_from is not None:
+        condition = ds.field('date_id') >= date_from
+    if date_to is not None:
+        upper = ds.field('date_id') <= date_to
+        condition = upper if condition is None else condition & upper
+    if platform_id is not None:
+        same_platform = ds.field('platform_id') == platform_id
+        condition = same_platform if condition is None else condition & same_platform
+
+    dataset = ds.dataset(files, schema=archive_schema(), format='parquet')
+    for batch in dataset.to_batches(columns=columns, filter=condition, batch_size=batch_size):
+        if batch.num_rows:
+            # Dictionary columns would come back as categoricals; hand out plain values like the hot table
+            frame = batch.to_pandas()
+            for column in DICTIONARY_COLUMNS:
+                if column in frame:
+                    frame[column] = frame[column].astype(object).where(frame[column].notna(), None)
+            yield frame
+
+def read_facts(date_from: Optional[int] = None, date_to: Optional[int] = None,
+               platform_id: Optional[str] = None, columns: Optional[List[str]] = None,
+               engine=None) -> pd.DataFrame:
+    """Fact rows in a date_id range from the hot table and the archive alike"""
+    engine = engine or get_db_engine()
+    columns = columns or ARCHIVE_COLUMNS
+    with engine.connect() as conn:
+        hot = pd.read_sql(text(f"""
+            SELECT {', '.join(columns)} FROM {fact_source(conn, date_from, date_to)}
+            WHERE date_id >= COALESCE(:date_from, 0)
+            AND date_id <= COALESCE(:date_to, 99999999)
+            AND (:platform_id IS NULL OR platform_id = :platform_id)
+        """), conn, params={'date_from': date_from, 'date_to': date_to, 'platform_id': platform_id})
+        archived = list(iter_archived_facts(conn, date_from, date_to, platform_id, columns))
+
+    if not archived:
+        return hot
+    return pd.concat(archived + ([hot] if len(hot) else []), ignore_index=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive closed months of fact_music_metrics to Parquet")
+    parser.add_argument('--prune', action='store_true', default=None,
+                        help="delete archived rows from the hot table (default: ARCHIVE_PRUNE)")
+    parser.add_argument('--before', type=int, help="archive months before this YYYYMM (default: ARCHIVE_HOT_MONTHS)")
+    args = parser.parse_args()
+    archive_closed_months(cutoff=args.before, prune=args.prune)
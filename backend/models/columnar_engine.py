@@ -0,0 +1,92 @@
+# backend/models/columnar_engine.py
+import os
+import threading
+from typing import Optional, Sequence
+import pandas as pd
+from utils.config import Config
+
+try:
+    import duckdb
+except ImportError:  # duckdb is optional; aggregations then run on SQLite
+    duckdb = None
+
+ATTACHED_DATABASE = 'music'
+
+class ColumnarEngine:
+    """Embedded DuckDB that reads the SQLite database for wide aggregations.
+
+    DuckDB attaches the SQLite file read-only through its sqlite extension and
+    runs scans and aggregates vectorized over all cores, where SQLite walks one
+    row at a time on one thread. SQLite stays the system of record: DuckDB
+    keeps no copy, and each query sees the latest committed transaction.
+
+    Routed queries must be written in SQL both engines accept (no
+    strftime('now', ...) or other SQLite-only functions; bind dates instead).
+    They aggregate agg_metrics_daily, the widest table a request reads:
+    request paths no longer scan fact_music_metrics itself.
+    """
+
+    def __init__(self, engine_name: Optional[str] = None):
+        self.engine_name = (engine_name or Config.ANALYTICS_ENGINE).lower()
+        self._connections = {}
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return duckdb is not None and self.engine_name == 'duckdb' and _sqlite_path() is not None
+
+    def read_frame(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        """Run a read-only query with ? placeholders and return its result as a DataFrame"""
+        cursor = self._connection().cursor()
+        try:
+            # Cursors are separate DuckDB connections and do not inherit USE
+            cursor.execute(f"USE {ATTACHED_DATABASE}")
+            frame = cursor.execute(sql, list(params)).df()
+        finally:
+            cursor.close()
+        with self._lock:
+            self.queries += 1
+        return frame
+
+    def record_fallback(self) -> None:
+        """Count a query that failed here and was answered by SQLite instead"""
+        with self._lock:
+            self.fallbacks += 1
+
+    def stats(self):
+        with self._lock:
+            queries, fallbacks = self.queries, self.fallbacks
+        return {
+            'engine': 'duckdb' if self.enabled else 'sqlite',
+            'requested': self.engine_name,
+            'duckdb_installed': duckdb is not None,
+            'queries': queries,
+            'fallbacks': fallbacks
+        }
+
+    def _connection(self):
+        path = _sqlite_path()
+        key = (os.getpid(), path)
+        connection = self._connections.get(key)
+        if connection is not None:
+            return connection
+
+        with self._lock:
+            connection = self._connections.get(key)
+            if connection is None:
+                connection = duckdb.connect(':memory:')
+                escaped = os.path.abspath(path).replace("'", "''")
+                connection.execute(f"ATTACH '{escaped}' AS {ATTACHED_DATABASE} (TYPE sqlite, READ_ONLY)")
+                self._connections[key] = connection
+        return connection
+
+def _sqlite_path() -> Optional[str]:
+    """Database file behind DATABASE_URL, or None when it is not a SQLite file"""
+    db_url = os.environ.get('DATABASE_URL', 'sqlite:///data/music_analytics.db')
+    if not db_url.startswith('sqlite:///') or ':memory:' in db_url or db_url == 'sqlite:///':
+        return None
+    return db_url.replace('sqlite:///', '')
+
+columnar_engine = ColumnarEngine()
@@ -0,0 +1,98 @@
+# backend/models/data_versions.py
+from sqlalchemy import text
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+# Every committed change bumps the global scope; narrower scopes let caches of
+# per-platform or per-artist responses survive unrelated ingestions.
+GLOBAL_SCOPE = 'global'
+
+def platform_scope(platform_id: str) -> str:
+    return f"platform:{platform_id}"
+
+def artist_scope(artist_id: str) -> str:
+    return f"artist:{artist_id}"
+
+# change_version stamps a scope (and catalog rows, see next_change_version) with
+# the global version of the transaction that changed it. SQLite serializes
+# writers, so global versions follow commit order: a reader that sees global
+# version V has seen every change stamped <= V, and anything committed later is
+# stamped > V. The global version is therefore a safe incremental watermark,
+# unlike timestamps taken before a slow transaction commits.
+_BUMP_GLOBAL_SQL = """
+    INSERT INTO data_versions (scope, version, change_version) VALUES (:scope, 1, 1)
+    ON CONFLICT (scope) DO UPDATE SET
+        version = data_versions.version + 1,
+        change_version = data_versions.version + 1,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+_CURRENT_GLOBAL_SQL = f"(SELECT version FROM data_versions WHERE scope = '{GLOBAL_SCOPE}')"
+
+_BUMP_SQL = f"""
+    INSERT INTO data_versions (scope, version, change_version) VALUES (:scope, 1, {_CURRENT_GLOBAL_SQL})
+    ON CONFLICT (scope) DO UPDATE SET
+        version = data_versions.version + 1,
+        change_version = excluded.change_version,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+def bump_data_versions(conn, scopes: Iterable[str] = ()) -> None:
+    """Increment the global version and each given scope on an open transaction"""
+    conn.execute(text(_BUMP_GLOBAL_SQL), {'scope': GLOBAL_SCOPE})
+    scopes = sorted({scope for scope in scopes if scope} - {GLOBAL_SCOPE})
+    if scopes:
+        conn.execute(text(_BUMP_SQL), [{'scope': scope} for scope in scopes])
+
+def next_change_version(conn) -> int:
+    """change_version to stamp on rows written by the open transaction.
+
+    It is the global version the transaction's own bump_data_versions call will
+    commit, so the transaction must bump (every catalog write does).
+    """
+    return (conn.execute(text(f"SELECT {_CURRENT_GLOBAL_SQL}")).scalar() or 0) + 1
+
+def bump_batch_versions(conn, platform_ids: Iterable[str], isrc_sql: str,
+                        params: Optional[dict] = None) -> None:
+    """Bump global, platform and artist scopes touched by a fact batch.
+
+    isrc_sql selects the batch's isrc values; artists are resolved through
+    dim_tracks in the same statement so no ids round-trip through Python.
+    """
+    bump_data_versions(conn, (platform_scope(platform_id) for platform_id in platform_ids if platform_id))
+
+    conn.execute(text(f"""
+        INSERT INTO data_versions (scope, version, change_version)
+        SELECT DISTINCT 'artist:' || t.artist_id, 1, {_CURRENT_GLOBAL_SQL}
+        FROM dim_tracks t
+        WHERE t.artist_id IS NOT NULL
+        AND t.isrc IN ({isrc_sql})
+        ON CONFLICT (scope) DO UPDATE SET
+            version = data_versions.version + 1,
+            change_version = excluded.change_version,
+            updated_at = CURRENT_TIMESTAMP
+    """), params or {})
+
+def get_data_versions(conn, scopes: Iterable[str]) -> Dict[str, int]:
+    """Current version per scope (0 for scopes that were never bumped)"""
+    return {scope: version for scope, (version, _) in get_data_version_state(conn, scopes).items()}
+
+def get_data_version_state(conn, scopes: Iterable[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+    """(version, last bump time in UTC) per scope; (0, None) for scopes never bumped"""
+    scopes = list(dict.fromkeys(scopes))
+    state = {scope: (0, None) for scope in scopes}
+    if not scopes:
+        return state
+
+    placeholders = ', '.join(f":scope_{i}" for i in range(len(scopes)))
+    rows = conn.execute(
+        text(f"SELECT scope, version, updated_at FROM data_versions WHERE scope IN ({placeholders})"),
+        {f"scope_{i}": scope for i, scope in enumerate(scopes)}
+    ).fetchall()
+
+    for scope, version, updated_at in rows:
+        if isinstance(updated_at, str):
+            # CURRENT_TIMESTAMP is stored as UTC text
+            updated_at = datetime.strptime(updated_at, '%Y-%m-%d %H:%M:%S')
+        state[scope] = (version, updated_at.replace(tzinfo=timezone.utc) if updated_at else None)
+    return state
@@ -1,25 +1,277 @@
 # backend/models/database.py
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, exc, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from typing import Dict, List, Optional, Sequence
 import os
+import threading
+import pandas as pd
+import time
+from utils.config import Config
+
+class PoolWaitStats:
+    """Thread-safe counters for one engine's connection pool"""
+    
+    def __init__(self, max_overflow: int):
+        self.max_overflow = max_overflow
+        self._lock = threading.Lock()
+        self._counters = {
+            'checkouts': 0,
+            'connections_opened': 0,
+            'timeouts': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0
+        }
+    
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self._counters['timeouts'] += int(timed_out)
+            self._counters['total_wait_seconds'] += seconds
+            self._counters['max_wait_seconds'] = max(self._counters['max_wait_seconds'], seconds)
+    
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self._counters)
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection.
+    
+    Only public pool API is used: the wait is timed around connect(), and
+    checkouts / new connections are counted by the pool's checkout and
+    connect events (registered in _create_engine). Pools re-created after
+    invalidation keep the same counters.
+    """
+    
+    def __init__(self, *args, wait_stats: Optional[PoolWaitStats] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = wait_stats or PoolWaitStats(kwargs.get('max_overflow', 10))
+    
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record_wait(time.perf_counter() - started)
+        return connection
+    
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+# One engine (and pool) per database URL per process. Keyed by pid so forked
+# ingestion and gunicorn workers never reuse a parent's pooled connections.
+_engines = {}
+_engines_lock = threading.Lock()
 
 def get_db_engine():
-    """Get database engine with connection pooling"""
+    """Get the process-wide shared database engine for DATABASE_URL"""
     db_path = os.environ.get('DATABASE_URL', 'sqlite:///data/music_analytics.db')
+    key = (os.getpid(), db_path)
+    
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
     
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _create_engine(db_path)
+            _engines[key] = engine
+    
+    return engine
+
+def _create_engine(db_path: str):
+    """Create an engine with pool sizing and timeouts from Config"""
     # Create directory if it doesn't exist for SQLite
     if db_path.startswith('sqlite:///'):
         db_file_path = db_path.replace('sqlite:///', '')
-        os.makedirs(os.path.dirname(db_file_path), exist_ok=True)
+        if os.path.dirname(db_file_path):
+            os.makedirs(os.path.dirname(db_file_path), exist_ok=True)
+    
+    pool_options = {}
+    if ':memory:' not in db_path and db_path not in ('sqlite://', 'sqlite:///'):
+        pool_options = {
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': Config.DATABASE_POOL_SIZE,
+            'max_overflow': Config.DATABASE_MAX_OVERFLOW,
+            'pool_timeout': Config.DATABASE_POOL_TIMEOUT
+        }
     
     engine = create_engine(
         db_path,
         echo=False,
         pool_pre_ping=True,
-        pool_recycle=3600
+        pool_recycle=Config.DATABASE_POOL_RECYCLE,
+        **pool_options
     )
+    
+    if db_path.startswith('sqlite') and Config.SQLITE_TUNING:
+        event.listen(engine, 'connect', apply_sqlite_pragmas)
+    
+    wait_stats = getattr(engine.pool, 'wait_stats', None)
+    if wait_stats is not None:
+        event.listen(engine, 'checkout', lambda *args: wait_stats.increment('checkouts'))
+        event.listen(engine, 'connect', lambda *args: wait_stats.increment('connections_opened'))
+    
     return engine
 
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    """Apply the SQLite performance profile from Config to a new DB-API connection.
+    
+    WAL lets readers run while a writer commits, so API workers are not blocked
+    by ingestion; the busy timeout makes concurrent writers wait instead of failing.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(Config.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA journal_mode = {Config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {Config.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size = {int(Config.SQLITE_MMAP_SIZE_MB) * 1024 * 1024}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size = {-int(Config.SQLITE_CACHE_SIZE_MB) * 1024}")
+        cursor.execute(f"PRAGMA temp_store = {Config.SQLITE_TEMP_STORE}")
+    finally:
+        cursor.close()
+
+def get_pool_stats() -> Dict:
+    """Connection pool statistics for this process's shared engine"""
+    engine = get_db_engine()
+    pool = engine.pool
+    
+    stats = {
+        'pool_class': type(pool).__name__,
+        'status': pool.status()
+    }
+    
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(0, pool.overflow()),
+            'timeout_seconds': pool.timeout()
+        })
+    
+    wait_stats = getattr(pool, 'wait_stats', None)
+    if wait_stats is not None:
+        counters = wait_stats.snapshot()
+        stats.update(counters)
+        stats['max_overflow'] = wait_stats.max_overflow
+        stats['avg_wait_ms'] = round(
+            1000 * counters['total_wait_seconds'] / max(1, counters['checkouts']), 3)
+    
+    return stats
+
+def dispose_engines() -> None:
+    """Dispose every shared engine created by this process"""
+    with _engines_lock:
+        for (pid, _), engine in list(_engines.items()):
+            if pid == os.getpid():
+                engine.dispose()
+        _engines.clear()
+
+# Insertable columns of fact_music_metrics (metric_id is allocated by models.partitions)
+FACT_METRIC_COLUMNS = [
+    'isrc', 'platform_id', 'country_code', 'date_id', 'metric_value', 'metric_type',
+    'product_type', 'user_type', 'age_group', 'gender', 'source_file', 'batch_id',
+    'processing_date', 'environment', 'data_quality_score'
+]
+
+def bulk_insert(conn, table: str, columns: List[str], rows: Sequence[tuple],
+                batch_size: int = 50000) -> int:
+    """Insert positional rows with batched executemany on an open transaction.
+    
+    Returns the number of rows written so callers never need to re-count the table.
+    """
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({_placeholders(conn, len(columns))})"
+    return _execute_batches(conn, sql, rows, batch_size)
+
+def ensure_date_dimension(conn, date_ids) -> List[int]:
+    """Create any missing dim_dates rows covering the span of date_ids (YYYYMMDD).
+    
+    The whole min..max calendar range is generated in one batch so later files
+    for the same period find their rows already present. Returns the date ids
+    that are now known to exist.
+    """
+    dates = pd.to_datetime(pd.Series([str(int(date_id)) for date_id in set(date_ids)], dtype=object),
+                           format='%Y%m%d', errors='coerce').dropna()
+    if dates.empty:
+        return []
+    
+    calendar = pd.date_range(dates.min(), dates.max(), freq='D')
+    ids = (calendar.year * 10000 + calendar.month * 100 + calendar.day).tolist()
+    rows = list(zip(
+        ids,
+        calendar.strftime('%Y-%m-%d').tolist(),
+        calendar.year.tolist(),
+        calendar.month.tolist(),
+        calendar.month_name().tolist(),
+        calendar.quarter.tolist(),
+        calendar.dayofweek.tolist(),
+        calendar.day_name().tolist(),
+        (calendar.dayofweek >= 5).astype(int).tolist()
+    ))
+    
+    columns = ['date_id', 'full_date', 'year', 'month', 'month_name', 'quarter',
+               'day_of_week', 'day_name', 'is_weekend']
+    sql = (
+        f"INSERT INTO dim_dates ({', '.join(columns)}) VALUES ({_placeholders(conn, len(columns))}) "
+        f"ON CONFLICT (date_id) DO NOTHING"
+    )
+    _execute_batches(conn, sql, rows, 50000)
+    return ids
+
+def add_missing_column(conn, table: str, column: str, definition: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN unless the column exists; True when it was added"""
+    existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+    if column in existing:
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+    return True
+
+def bulk_upsert(conn, table: str, columns: List[str], rows: Sequence[tuple],
+                key_columns: List[str], batch_size: int = 50000) -> int:
+    """Insert rows, merging into existing rows on key conflict (INSERT ... ON CONFLICT).
+    
+    Non-null incoming attributes overwrite stored ones; nulls keep the stored value,
+    so partial metadata files never erase what earlier files provided.
+    """
+    update_columns = [col for col in columns if col not in key_columns and col != 'created_at']
+    assignments = [f"{col} = COALESCE(excluded.{col}, {table}.{col})" for col in update_columns]
+    assignments.append("updated_at = CURRENT_TIMESTAMP")
+    
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({_placeholders(conn, len(columns))}) "
+        f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {', '.join(assignments)}"
+    )
+    return _execute_batches(conn, sql, rows, batch_size)
+
+def _placeholders(conn, count: int) -> str:
+    """Positional placeholders in the driver's paramstyle"""
+    paramstyle = conn.dialect.paramstyle
+    if paramstyle == 'qmark':
+        return ', '.join('?' for _ in range(count))
+    elif paramstyle == 'numeric':
+        return ', '.join(f':{i + 1}' for i in range(count))
+    return ', '.join('%s' for _ in range(count))
+
+def _execute_batches(conn, sql: str, rows: Sequence[tuple], batch_size: int) -> int:
+    """Run executemany in batches and return the number of rows sent"""
+    written = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        conn.exec_driver_sql(sql, batch)
+        written += len(batch)
+    
+    return written
+
 def get_session():
     """Get database session"""
     engine = get_db_engine()
@@ -42,7 +294,8 @@ def init_database():
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 is_auto_generated INTEGER DEFAULT 0,
                 total_tracks INTEGER DEFAULT 0,
-                total_streams INTEGER DEFAULT 0
+                total_streams INTEGER DEFAULT 0,
+                change_version INTEGER NOT NULL DEFAULT 0
             )
         """))
         
@@ -60,6 +313,7 @@ def init_database():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 total_streams INTEGER DEFAULT 0,
+                change_version INTEGER NOT NULL DEFAULT 0,
                 FOREIGN KEY (artist_id) REFERENCES dim_artists(artist_id)
             )
         """))
@@ -104,32 +358,6 @@ def init_database():
             )
         """))
         
-        # Main fact table
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS fact_music_metrics (
-                metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                isrc TEXT,
-                platform_id TEXT NOT NULL,
-                country_code TEXT,
-                date_id INTEGER,
-                metric_value REAL NOT NULL,
-                metric_type TEXT,
-                product_type TEXT,
-                user_type TEXT,
-                age_group TEXT,
-                gender TEXT,
-                source_file TEXT,
-                batch_id TEXT,
-                processing_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                environment TEXT DEFAULT 'prod',
-                data_quality_score REAL DEFAULT 1.0,
-                FOREIGN KEY (isrc) REFERENCES dim_tracks(isrc),
-                FOREIGN KEY (platform_id) REFERENCES dim_platforms(platform_id),
-                FOREIGN KEY (country_code) REFERENCES dim_countries(country_code),
-                FOREIGN KEY (date_id) REFERENCES dim_dates(date_id)
-            )
-        """))
-        
         # Processing history table
         conn.execute(text("""
             CREATE TABLE IF NOT EXISTS processing_history (
@@ -206,18 +434,92 @@ def init_database():
             )
         """))
         
+        # Daily rollup at (date, isrc, platform, country, metric type) grain,
+        # maintained incrementally by ingestion. Unknown keys use 0 / '' sentinels.
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS agg_metrics_daily (
+                date_id INTEGER NOT NULL,
+                isrc TEXT NOT NULL,
+                platform_id TEXT NOT NULL,
+                country_code TEXT NOT NULL,
+                metric_type TEXT NOT NULL,
+                metric_value REAL NOT NULL DEFAULT 0,
+                record_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (date_id, isrc, platform_id, country_code, metric_type)
+            )
+        """))
+        
+        # Per-artist monthly rollup (year_month = YYYYMM, 0 when the date is unknown)
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS agg_artist_monthly (
+                year_month INTEGER NOT NULL,
+                artist_id TEXT NOT NULL,
+                platform_id TEXT NOT NULL,
+                metric_type TEXT NOT NULL,
+                metric_value REAL NOT NULL DEFAULT 0,
+                record_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (year_month, artist_id, platform_id, metric_type)
+            )
+        """))
+        
+        # Monotonic data versions bumped by every committed ingestion, used to
+        # key API caches so they invalidate precisely instead of on a timer
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS data_versions (
+                scope TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                change_version INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        
+        # Commit-ordered change stamps (models/data_versions.py) for databases that pre-date them
+        for table in ['dim_artists', 'dim_tracks', 'data_versions']:
+            add_missing_column(conn, table, 'change_version', 'INTEGER NOT NULL DEFAULT 0')
+        
+        # Parquet files holding archived months of fact_music_metrics (models/archive.py)
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS archive_partitions (
+                file_path TEXT PRIMARY KEY,
+                year_month INTEGER NOT NULL,
+                platform_id TEXT NOT NULL,
+                first_metric_id INTEGER NOT NULL,
+                last_metric_id INTEGER NOT NULL,
+                row_count INTEGER NOT NULL,
+                file_size_bytes INTEGER,
+                pruned INTEGER NOT NULL DEFAULT 0,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        
+        # One-time data migrations already applied to this database
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        
+        # Fact rows live in monthly partitions behind the fact_music_metrics view (models/partitions.py)
+        from models.partitions import init_fact_partitions
+        init_fact_partitions(conn)
+        
         # Create indexes for performance
         indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_metrics_platform ON fact_music_metrics(platform_id)",
-            "CREATE INDEX IF NOT EXISTS idx_metrics_date ON fact_music_metrics(date_id)",
-            "CREATE INDEX IF NOT EXISTS idx_metrics_country ON fact_music_metrics(country_code)",
-            "CREATE INDEX IF NOT EXISTS idx_metrics_isrc ON fact_music_metrics(isrc)",
-            "CREATE INDEX IF NOT EXISTS idx_metrics_value ON fact_music_metrics(metric_value)",
             "CREATE INDEX IF NOT EXISTS idx_tracks_artist ON dim_tracks(artist_id)",
             "CREATE INDEX IF NOT EXISTS idx_artists_name ON dim_artists(artist_name_normalized)",
+            "CREATE INDEX IF NOT EXISTS idx_artists_streams ON dim_artists(total_streams DESC, artist_id)",
+            "CREATE INDEX IF NOT EXISTS idx_artists_change_version ON dim_artists(change_version)",
+            "CREATE INDEX IF NOT EXISTS idx_tracks_change_version ON dim_tracks(change_version)",
+            "CREATE INDEX IF NOT EXISTS idx_data_versions_change_version ON data_versions(change_version)",
             "CREATE INDEX IF NOT EXISTS idx_dates_full ON dim_dates(full_date)",
             "CREATE INDEX IF NOT EXISTS idx_processing_status ON processing_history(processing_status)",
-            "CREATE INDEX IF NOT EXISTS idx_processing_date ON processing_history(processing_date)"
+            "CREATE INDEX IF NOT EXISTS idx_processing_date ON processing_history(processing_date)",
+            "CREATE INDEX IF NOT EXISTS idx_agg_daily_isrc ON agg_metrics_daily(isrc, date_id)",
+            "CREATE INDEX IF NOT EXISTS idx_agg_artist_monthly_artist ON agg_artist_monthly(artist_id, year_month)",
+            "CREATE INDEX IF NOT EXISTS idx_archive_partitions_month ON archive_partitions(year_month, platform_id)"
         ]
         
         for index in indexes:
@@ -296,6 +598,34 @@ def init_database():
         
         conn.commit()
         
+        # Backfill rollups once for databases that pre-date them
+        has_rollups = conn.execute(text("SELECT 1 FROM agg_metrics_daily LIMIT 1")).fetchone()
+        has_facts = conn.execute(text("SELECT 1 FROM fact_music_metrics LIMIT 1")).fetchone()
+        if has_facts and not has_rollups:
+            from models.rollups import rebuild_rollups
+            rebuild_rollups(conn)
+            conn.commit()
+            print("✅ Rollup tables backfilled from fact_music_metrics")
+        
+        # Stream counters were not maintained before; derive them once from the rollups
+        if conn.execute(text(
+            "INSERT OR IGNORE INTO schema_migrations (name) VALUES ('stream_counters_backfill')"
+        )).rowcount:
+            from models.rollups import refresh_counters
+            refresh_counters(conn)
+            print("✅ Artist and track counters backfilled from rollups")
+        conn.commit()
+        
+        # Artist search index, backfilled once for existing catalogs
+        from models.search_index import SEARCH_TABLE, create_search_index, rebuild_search_index
+        if create_search_index(conn):
+            has_documents = conn.execute(text(f"SELECT 1 FROM {SEARCH_TABLE} LIMIT 1")).fetchone()
+            has_artists = conn.execute(text("SELECT 1 FROM dim_artists LIMIT 1")).fetchone()
+            if has_artists and not has_documents:
+                rebuild_search_index(conn)
+                print("✅ Artist search index backfilled from dim_artists")
+            conn.commit()
+        
     print("✅ Database schema initialized successfully")
 
 def create_sample_data():
@@ -372,16 +702,16 @@ def create_sample_data():
             )
             sample_metrics.append(metric)
         
-        # Insert sample metrics
-        for metric in sample_metrics:
-            try:
-                conn.execute(text("""
-                    INSERT INTO fact_music_metrics 
-                    (isrc, platform_id, country_code, date_id, metric_value, metric_type, product_type, batch_id, environment)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """), metric)
-            except:
-                pass
+        # Insert sample metrics into their monthly partitions
+        from models.partitions import insert_facts
+        insert_facts(conn, ['isrc', 'platform_id', 'country_code', 'date_id', 'metric_value',
+                            'metric_type', 'product_type', 'batch_id', 'environment'], sample_metrics)
+        
+        # Sample rows bypass the ingestion path, so recompute the rollups and search index
+        from models.rollups import rebuild_rollups
+        from models.search_index import rebuild_search_index
+        rebuild_rollups(conn)
+        rebuild_search_index(conn)
         
         conn.commit()
     
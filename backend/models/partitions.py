@@ -0,0 +1,231 @@
+# backend/models/partitions.py
+from datetime import date
+from sqlalchemy import text
+from typing import Dict, List, Optional, Sequence
+from models.database import FACT_METRIC_COLUMNS, bulk_insert
+from utils.config import Config
+
+# fact_music_metrics is stored as one table per calendar month,
+# fact_music_metrics_YYYYMM (rows without a date in fact_music_metrics_000000),
+# behind a UNION ALL view of the same name for queries that span everything.
+# Date-bounded reads use fact_source() to touch only the overlapping months,
+# and a closed month can be archived and dropped without rewriting the rest.
+# Dates outside [FACT_PARTITION_MIN_YEAR, next year] share one overflow
+# partition (fact_music_metrics_999999) so stray dates cannot create
+# hundreds of near-empty tables.
+FACT_VIEW = 'fact_music_metrics'
+PARTITION_PREFIX = 'fact_music_metrics_'
+PARTITION_GLOB = PARTITION_PREFIX + '[0-9][0-9][0-9][0-9][0-9][0-9]'
+UNDATED = 0
+OUT_OF_RANGE = 999999
+
+# SQLite rejects compound SELECTs of more than 500 terms
+# (SQLITE_MAX_COMPOUND_SELECT), so wide unions are nested in chunks
+UNION_CHUNK = 400
+
+# metric_id is allocated from one sequence so ids stay unique and increasing
+# across partitions (archive watermarks rely on this)
+SEQUENCE_TABLE = 'fact_metric_sequence'
+
+FACT_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        metric_id INTEGER PRIMARY KEY,
+        isrc TEXT,
+        platform_id TEXT NOT NULL,
+        country_code TEXT,
+        date_id INTEGER,
+        metric_value REAL NOT NULL,
+        metric_type TEXT,
+        product_type TEXT,
+        user_type TEXT,
+        age_group TEXT,
+        gender TEXT,
+        source_file TEXT,
+        batch_id TEXT,
+        processing_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        environment TEXT DEFAULT 'prod',
+        data_quality_score REAL DEFAULT 1.0,
+        FOREIGN KEY (isrc) REFERENCES dim_tracks(isrc),
+        FOREIGN KEY (platform_id) REFERENCES dim_platforms(platform_id),
+        FOREIGN KEY (country_code) REFERENCES dim_countries(country_code),
+        FOREIGN KEY (date_id) REFERENCES dim_dates(date_id)
+    )
+"""
+
+FACT_INDEXES = {
+    'platform': 'platform_id',
+    'date': 'date_id',
+    'country': 'country_code',
+    'isrc': 'isrc',
+    'value': 'metric_value',
+    'batch': 'batch_id'
+}
+
+def partition_table(year_month: int) -> str:
+    return f"{PARTITION_PREFIX}{int(year_month):06d}"
+
+def partition_month(date_id) -> int:
+    """year_month (YYYYMM) a date_id belongs to; UNDATED for missing dates,
+    OUT_OF_RANGE for years outside the partitioned window"""
+    if date_id is None or date_id != date_id:
+        return UNDATED
+    year_month = int(date_id) // 100
+    if not Config.FACT_PARTITION_MIN_YEAR <= year_month // 100 <= date.today().year + 1:
+        return OUT_OF_RANGE
+    return year_month
+
+def list_partitions(conn) -> List[int]:
+    """year_month of every fact partition, oldest first (UNDATED first)"""
+    names = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB :pattern ORDER BY name"
+    ), {'pattern': PARTITION_GLOB}).scalars().all()
+    return [int(name[len(PARTITION_PREFIX):]) for name in names]
+
+def partition_tables(conn, date_from: Optional[int] = None, date_to: Optional[int] = None) -> List[str]:
+    """Partitions that can hold rows with date_id in [date_from, date_to].
+
+    Undated rows are only part of unbounded reads; the overflow partition
+    is part of every read, so callers still filter on date_id.
+    """
+    if date_from is None and date_to is None:
+        return [partition_table(month) for month in list_partitions(conn)]
+
+    first = date_from // 100 if date_from is not None else UNDATED + 1
+    last = date_to // 100 if date_to is not None else OUT_OF_RANGE
+    return [partition_table(month) for month in list_partitions(conn)
+            if month == OUT_OF_RANGE or (month != UNDATED and first <= month <= last)]
+
+def union_all(tables: Sequence[str]) -> str:
+    """SELECT over the rows of all tables, nesting chunks to stay under SQLite's compound SELECT limit"""
+    selects = [f"SELECT * FROM {table}" for table in tables]
+    while len(selects) > UNION_CHUNK:
+        selects = [f"SELECT * FROM ({' UNION ALL '.join(selects[start:start + UNION_CHUNK])})"
+                   for start in range(0, len(selects), UNION_CHUNK)]
+    return ' UNION ALL '.join(selects)
+
+def fact_source(conn, date_from: Optional[int] = None, date_to: Optional[int] = None) -> str:
+    """FROM-clause source of the fact rows in a date_id range, touching only overlapping partitions"""
+    tables = partition_tables(conn, date_from, date_to)
+    if not tables:
+        return f"(SELECT * FROM {partition_table(UNDATED)} WHERE 0)"
+    if len(tables) == 1:
+        return tables[0]
+    return f"({union_all(tables)})"
+
+def ensure_partitions(conn, year_months) -> List[int]:
+    """Create missing partitions (and refresh the view); returns the months created"""
+    existing = set(list_partitions(conn))
+    missing = sorted(set(year_months) - existing)
+    if not missing:
+        return []
+
+    # A savepoint makes table creation and the view swap atomic even outside a transaction
+    conn.exec_driver_sql("SAVEPOINT fact_partitions")
+    for month in missing:
+        table = partition_table(month)
+        conn.exec_driver_sql(FACT_TABLE_DDL.format(table=table))
+        for suffix, column in FACT_INDEXES.items():
+            conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS idx_{table}_{suffix} ON {table}({column})")
+    refresh_fact_view(conn)
+    conn.exec_driver_sql("RELEASE fact_partitions")
+    return missing
+
+def refresh_fact_view(conn) -> None:
+    """Point the fact_music_metrics view at the current set of partitions"""
+    tables = [partition_table(month) for month in list_partitions(conn)]
+    conn.exec_driver_sql(f"DROP VIEW IF EXISTS {FACT_VIEW}")
+    conn.exec_driver_sql(f"CREATE VIEW {FACT_VIEW} AS {union_all(tables)}")
+
+def drop_partition(conn, year_month: int) -> None:
+    """Drop one month of facts (e.g. once archived and pruned); the undated partition is kept"""
+    if year_month == UNDATED:
+        return
+    conn.exec_driver_sql("SAVEPOINT fact_partitions")
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {partition_table(year_month)}")
+    refresh_fact_view(conn)
+    conn.exec_driver_sql("RELEASE fact_partitions")
+
+def insert_facts(conn, columns: List[str], rows: Sequence[tuple], batch_size: int = 50000) -> int:
+    """Route positional fact rows to their month partitions; returns the number of rows written"""
+    if not rows:
+        return 0
+
+    date_index = columns.index('date_id') if 'date_id' in columns else None
+    by_month: Dict[int, List[tuple]] = {}
+    for row in rows:
+        by_month.setdefault(partition_month(row[date_index]) if date_index is not None else UNDATED,
+                            []).append(row)
+    ensure_partitions(conn, by_month)
+
+    next_id = conn.execute(text(
+        f"UPDATE {SEQUENCE_TABLE} SET next_id = next_id + :count WHERE id = 1 RETURNING next_id - :count"
+    ), {'count': len(rows)}).scalar()
+
+    inserted = 0
+    for month, month_rows in by_month.items():
+        identified = [(next_id + offset,) + tuple(row) for offset, row in enumerate(month_rows)]
+        next_id += len(month_rows)
+        inserted += bulk_insert(conn, partition_table(month), ['metric_id'] + list(columns),
+                                identified, batch_size)
+    return inserted
+
+def delete_facts(conn, where_clause: str, params: Optional[dict] = None,
+                 date_from: Optional[int] = None, date_to: Optional[int] = None) -> int:
+    """DELETE matching fact rows from the partitions overlapping a date range; returns rows removed"""
+    removed = 0
+    for table in partition_tables(conn, date_from, date_to):
+        removed += conn.execute(text(f"DELETE FROM {table} WHERE {where_clause}"), params or {}).rowcount
+    return removed
+
+def init_fact_partitions(conn) -> None:
+    """Create the id sequence and view, moving rows of a pre-partitioning fact table into months"""
+    conn.exec_driver_sql(f"""
+        CREATE TABLE IF NOT EXISTS {SEQUENCE_TABLE} (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            next_id INTEGER NOT NULL
+        )
+    """)
+    conn.exec_driver_sql(f"INSERT OR IGNORE INTO {SEQUENCE_TABLE} (id, next_id) VALUES (1, 1)")
+
+    monolithic = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': FACT_VIEW}).fetchone()
+    if monolithic:
+        _split_monolithic_table(conn)
+
+    ensure_partitions(conn, [UNDATED])
+
+def _split_monolithic_table(conn) -> None:
+    legacy = FACT_VIEW + '_unpartitioned'
+    conn.exec_driver_sql(f"ALTER TABLE {FACT_VIEW} RENAME TO {legacy}")
+    months = {UNDATED if not month else partition_month(int(month) * 100 + 1)
+              for month in conn.execute(text(
+                  f"SELECT DISTINCT COALESCE(date_id, 0) / 100 FROM {legacy}"
+              )).scalars().all()}
+    ensure_partitions(conn, months | {UNDATED})
+
+    columns = 'metric_id, ' + ', '.join(FACT_METRIC_COLUMNS)
+    for month in months:
+        if month == UNDATED:
+            condition = "date_id IS NULL OR date_id / 100 = 0"
+        elif month == OUT_OF_RANGE:
+            condition = "date_id / 100 != 0 AND date_id / 10000 NOT BETWEEN :min_year AND :max_year"
+        else:
+            condition = "date_id / 100 = :month"
+        conn.execute(text(f"""
+            INSERT INTO {partition_table(month)} ({columns})
+            SELECT {columns} FROM {legacy} WHERE {condition}
+        """), {'month': month, 'min_year': Config.FACT_PARTITION_MIN_YEAR,
+               'max_year': date.today().year + 1})
+
+    # Never reuse ids of deleted (or archived) rows
+    conn.execute(text(f"""
+        UPDATE {SEQUENCE_TABLE} SET next_id = MAX(next_id,
+            COALESCE((SELECT MAX(metric_id) FROM {legacy}), 0) + 1,
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = '{legacy}'), 0) + 1,
+            COALESCE((SELECT MAX(last_metric_id) FROM archive_partitions), 0) + 1)
+        WHERE id = 1
+    """))
+    conn.exec_driver_sql(f"DROP TABLE {legacy}")
+    refresh_fact_view(conn)
+    print(f"✅ fact_music_metrics split into {len(months)} monthly partitions")
@@ -0,0 +1,237 @@
+# backend/models/rollups.py
+import pandas as pd
+from sqlalchemy import text
+from typing import Iterable, Optional
+from models.database import bulk_insert
+
+# Rollup grain columns. Unknown values are stored as sentinels (0 / '') because
+# NULLs never collide in a primary key, which would defeat ON CONFLICT merging.
+DAILY_KEY_COLUMNS = ['date_id', 'isrc', 'platform_id', 'country_code', 'metric_type']
+DAILY_ROLLUP_COLUMNS = DAILY_KEY_COLUMNS + ['metric_value', 'record_count']
+
+ROLLUP_STAGING_TABLE = 'tmp_rollup_batch'
+
+# dim_artists / dim_tracks.total_streams count this metric type only
+COUNTER_METRIC = 'streams'
+
+def update_rollups_from_batch(conn, metrics_df: pd.DataFrame) -> None:
+    """Fold a freshly inserted fact batch into the rollup tables.
+
+    Must run on the same connection/transaction as the fact insert so the
+    rollups can never disagree with fact_music_metrics.
+    """
+    if metrics_df is None or metrics_df.empty:
+        return
+
+    batch = pd.DataFrame({
+        'date_id': _column(metrics_df, 'date_id', 0).fillna(0).astype('int64'),
+        'isrc': _column(metrics_df, 'isrc', '').fillna('').astype(str),
+        'platform_id': _column(metrics_df, 'platform_id', '').fillna('').astype(str),
+        'country_code': _column(metrics_df, 'country_code', '').fillna('').astype(str),
+        'metric_type': _column(metrics_df, 'metric_type', '').fillna('').astype(str),
+        'metric_value': pd.to_numeric(metrics_df['metric_value'], errors='coerce').fillna(0)
+    })
+
+    grouped = batch.groupby(DAILY_KEY_COLUMNS, sort=False).agg(
+        metric_value=('metric_value', 'sum'),
+        record_count=('metric_value', 'size')
+    ).reset_index()
+
+    conn.exec_driver_sql(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {ROLLUP_STAGING_TABLE} (
+            date_id INTEGER, isrc TEXT, platform_id TEXT, country_code TEXT,
+            metric_type TEXT, metric_value REAL, record_count INTEGER
+        )
+    """)
+    conn.exec_driver_sql(f"DELETE FROM {ROLLUP_STAGING_TABLE}")
+
+    rows = list(zip(*[grouped[col].tolist() for col in DAILY_ROLLUP_COLUMNS]))
+    bulk_insert(conn, ROLLUP_STAGING_TABLE, DAILY_ROLLUP_COLUMNS, rows)
+
+    apply_rollup_delta(conn, f"SELECT * FROM {ROLLUP_STAGING_TABLE}")
+
+def subtract_batch_from_rollups(conn, batch_id: str) -> None:
+    """Remove a batch's contribution before its fact rows are deleted"""
+    apply_rollup_delta(conn, _fact_daily_source("WHERE batch_id = :batch_id"),
+                       {'batch_id': batch_id}, sign=-1)
+
+    conn.execute(text("DELETE FROM agg_metrics_daily WHERE record_count <= 0"))
+    conn.execute(text("DELETE FROM agg_artist_monthly WHERE record_count <= 0"))
+
+def apply_rollup_delta(conn, source_sql: str, params: Optional[dict] = None, sign: int = 1) -> None:
+    """Add (or subtract) daily-grain rows from source_sql into both rollup tables and the stream counters"""
+    conn.execute(text(f"""
+        INSERT INTO agg_metrics_daily
+            (date_id, isrc, platform_id, country_code, metric_type, metric_value, record_count)
+        SELECT date_id, isrc, platform_id, country_code, metric_type,
+               {sign} * metric_value, {sign} * record_count
+        FROM ({source_sql}) AS src
+        WHERE true
+        ON CONFLICT (date_id, isrc, platform_id, country_code, metric_type) DO UPDATE SET
+            metric_value = agg_metrics_daily.metric_value + excluded.metric_value,
+            record_count = agg_metrics_daily.record_count + excluded.record_count,
+            updated_at = CURRENT_TIMESTAMP
+    """), params or {})
+
+    conn.execute(text(f"""
+        INSERT INTO agg_artist_monthly
+            (year_month, artist_id, platform_id, metric_type, metric_value, record_count)
+        SELECT src.date_id / 100, t.artist_id, src.platform_id, src.metric_type,
+               {sign} * SUM(src.metric_value), {sign} * SUM(src.record_count)
+        FROM ({source_sql}) AS src
+        JOIN dim_tracks t ON src.isrc = t.isrc
+        WHERE t.artist_id IS NOT NULL
+        GROUP BY src.date_id / 100, t.artist_id, src.platform_id, src.metric_type
+        ON CONFLICT (year_month, artist_id, platform_id, metric_type) DO UPDATE SET
+            metric_value = agg_artist_monthly.metric_value + excluded.metric_value,
+            record_count = agg_artist_monthly.record_count + excluded.record_count,
+            updated_at = CURRENT_TIMESTAMP
+    """), params or {})
+
+    conn.execute(text(f"""
+        UPDATE dim_tracks SET total_streams = total_streams + delta.metric_value
+        FROM (
+            SELECT isrc, {sign} * SUM(metric_value) AS metric_value
+            FROM ({source_sql}) AS src
+            WHERE metric_type = '{COUNTER_METRIC}'
+            GROUP BY isrc
+        ) AS delta
+        WHERE dim_tracks.isrc = delta.isrc
+    """), params or {})
+
+    conn.execute(text(f"""
+        UPDATE dim_artists SET total_streams = total_streams + delta.metric_value
+        FROM (
+            SELECT t.artist_id, {sign} * SUM(src.metric_value) AS metric_value
+            FROM ({source_sql}) AS src
+            JOIN dim_tracks t ON src.isrc = t.isrc
+            WHERE src.metric_type = '{COUNTER_METRIC}' AND t.artist_id IS NOT NULL
+            GROUP BY t.artist_id
+        ) AS delta
+        WHERE dim_artists.artist_id = delta.artist_id
+    """), params or {})
+
+def refresh_counters(conn, artist_ids: Optional[Iterable[str]] = None,
+                     isrcs: Optional[Iterable[str]] = None) -> None:
+    """Recompute total_streams / total_tracks of the given artists and tracks from the rollups.
+
+    With neither given every counter is recomputed (backfill / repair job).
+    Needed when a track or artist row is created after its usage data arrived,
+    or when a track moves to another artist.
+    """
+    repair_all = artist_ids is None and isrcs is None
+    track_filter = artist_filter = ""
+    if not repair_all:
+        isrcs = [(isrc,) for isrc in set(isrcs or ()) if isrc]
+        artist_ids = [(artist_id,) for artist_id in set(artist_ids or ()) if artist_id]
+
+        conn.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS tmp_counter_tracks (isrc TEXT PRIMARY KEY)")
+        conn.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS tmp_counter_artists (artist_id TEXT PRIMARY KEY)")
+        conn.exec_driver_sql("DELETE FROM tmp_counter_tracks")
+        conn.exec_driver_sql("DELETE FROM tmp_counter_artists")
+        bulk_insert(conn, 'tmp_counter_tracks', ['isrc'], isrcs)
+        bulk_insert(conn, 'tmp_counter_artists', ['artist_id'], artist_ids)
+
+        track_filter = "WHERE dim_tracks.isrc IN (SELECT isrc FROM tmp_counter_tracks)"
+        artist_filter = "WHERE dim_artists.artist_id IN (SELECT artist_id FROM tmp_counter_artists)"
+
+    if repair_all or isrcs:
+        conn.execute(text(f"""
+            UPDATE dim_tracks SET total_streams = COALESCE((
+                SELECT SUM(r.metric_value) FROM agg_metrics_daily r
+                WHERE r.isrc = dim_tracks.isrc AND r.metric_type = '{COUNTER_METRIC}'
+            ), 0)
+            {track_filter}
+        """))
+
+    if repair_all or artist_ids:
+        conn.execute(text(f"""
+            UPDATE dim_artists SET
+                total_streams = COALESCE((
+                    SELECT SUM(m.metric_value) FROM agg_artist_monthly m
+                    WHERE m.artist_id = dim_artists.artist_id AND m.metric_type = '{COUNTER_METRIC}'
+                ), 0),
+                total_tracks = (SELECT COUNT(*) FROM dim_tracks t WHERE t.artist_id = dim_artists.artist_id)
+            {artist_filter}
+        """))
+
+def repair_counters() -> None:
+    """Recompute every denormalized counter in one transaction"""
+    from models.database import get_db_engine
+    with get_db_engine().begin() as conn:
+        refresh_counters(conn)
+    print("✅ Artist and track counters recomputed from rollups")
+
+def refresh_artist_rollups(conn, artist_ids: Optional[Iterable[str]] = None) -> None:
+    """Recompute per-artist monthly rollups from the daily rollup.
+
+    Needed when dim_tracks changes which artist an ISRC belongs to, or when
+    catalog metadata arrives after the usage data it describes.
+    """
+    if artist_ids is None:
+        conn.execute(text("DELETE FROM agg_artist_monthly"))
+        artist_filter = ""
+    else:
+        artist_ids = [(artist_id,) for artist_id in set(artist_ids) if artist_id]
+        if not artist_ids:
+            return
+
+        conn.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS tmp_rollup_artists (artist_id TEXT PRIMARY KEY)")
+        conn.exec_driver_sql("DELETE FROM tmp_rollup_artists")
+        bulk_insert(conn, 'tmp_rollup_artists', ['artist_id'], artist_ids)
+
+        artist_filter = "AND t.artist_id IN (SELECT artist_id FROM tmp_rollup_artists)"
+        conn.execute(text("""
+            DELETE FROM agg_artist_monthly
+            WHERE artist_id IN (SELECT artist_id FROM tmp_rollup_artists)
+        """))
+
+    conn.execute(text(f"""
+        INSERT INTO agg_artist_monthly
+            (year_month, artist_id, platform_id, metric_type, metric_value, record_count)
+        SELECT r.date_id / 100, t.artist_id, r.platform_id, r.metric_type,
+               SUM(r.metric_value), SUM(r.record_count)
+        FROM agg_metrics_daily r
+        JOIN dim_tracks t ON r.isrc = t.isrc
+        WHERE t.artist_id IS NOT NULL {artist_filter}
+        GROUP BY r.date_id / 100, t.artist_id, r.platform_id, r.metric_type
+    """))
+
+def rebuild_rollups(conn) -> None:
+    """Recompute every rollup from fact_music_metrics and its Parquet archive (backfill / repair)"""
+    from models.archive import iter_archived_facts
+    conn.execute(text("DELETE FROM agg_metrics_daily"))
+    conn.execute(text(f"""
+        INSERT INTO agg_metrics_daily
+            (date_id, isrc, platform_id, country_code, metric_type, metric_value, record_count)
+        {_fact_daily_source()}
+    """))
+    # Rows pruned from the hot table after archiving
+    for archived in iter_archived_facts(conn, columns=DAILY_KEY_COLUMNS + ['metric_value']):
+        update_rollups_from_batch(conn, archived)
+    refresh_artist_rollups(conn)
+    refresh_counters(conn)
+
+def _fact_daily_source(where_clause: str = "") -> str:
+    """Daily-grain aggregate of fact rows with sentinel-filled keys"""
+    return f"""
+        SELECT COALESCE(date_id, 0) AS date_id,
+               COALESCE(isrc, '') AS isrc,
+               platform_id,
+               COALESCE(country_code, '') AS country_code,
+               COALESCE(metric_type, '') AS metric_type,
+               SUM(metric_value) AS metric_value,
+               COUNT(*) AS record_count
+        FROM fact_music_metrics
+        {where_clause}
+        GROUP BY 1, 2, 3, 4, 5
+    """
+
+def _column(df: pd.DataFrame, name: str, default) -> pd.Series:
+    """Frame column, or a constant series when the batch does not carry it"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index)
+
+if __name__ == "__main__":
+    repair_counters()
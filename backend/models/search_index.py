@@ -0,0 +1,98 @@
+# backend/models/search_index.py
+from sqlalchemy import text
+from typing import Iterable, Optional
+from models.database import bulk_insert, get_db_engine
+
+# One FTS5 document per artist, keyed by an UNINDEXED artist_id column rather
+# than the dim_artists rowid, which VACUUM may renumber. The trigram tokenizer
+# matches any case-insensitive substring of at least three characters, which
+# is what the old LIKE '%q%' search did, without scanning dim_artists.
+SEARCH_TABLE = 'search_artists_fts'
+MIN_MATCH_LENGTH = 3
+
+def create_search_index(conn) -> bool:
+    """Create the artist search index; False when SQLite lacks FTS5.
+
+    An index from before documents carried artist_id is dropped and recreated
+    empty, so init_database backfills it.
+    """
+    try:
+        columns = [row[1] for row in conn.execute(text(f"PRAGMA table_info({SEARCH_TABLE})"))]
+        if columns and 'artist_id' not in columns:
+            conn.execute(text(f"DROP TABLE {SEARCH_TABLE}"))
+        conn.execute(text(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+                artist_id UNINDEXED, artist_name, artist_name_normalized, track_names, album_names,
+                tokenize = 'trigram'
+            )
+        """))
+        return True
+    except Exception as e:
+        print(f"⚠️ Full-text search index unavailable, falling back to LIKE scans: {e}")
+        return False
+
+def has_search_index(conn) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': SEARCH_TABLE}).fetchone() is not None
+
+def refresh_search_index(conn, artist_ids: Optional[Iterable[str]] = None) -> None:
+    """Re-derive the search documents of the given artists (all when None).
+
+    Runs on the same transaction as the dim_artists / dim_tracks upsert, so
+    documents never commit out of step with the catalog.
+    """
+    if not has_search_index(conn):
+        return
+
+    if artist_ids is None:
+        conn.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        artist_filter = ""
+    else:
+        artist_ids = [(artist_id,) for artist_id in set(artist_ids) if artist_id]
+        if not artist_ids:
+            return
+
+        conn.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS tmp_search_artists (artist_id TEXT PRIMARY KEY)")
+        conn.exec_driver_sql("DELETE FROM tmp_search_artists")
+        bulk_insert(conn, 'tmp_search_artists', ['artist_id'], artist_ids)
+
+        artist_filter = "WHERE a.artist_id IN (SELECT artist_id FROM tmp_search_artists)"
+        conn.execute(text(f"""
+            DELETE FROM {SEARCH_TABLE} WHERE artist_id IN (SELECT artist_id FROM tmp_search_artists)
+        """))
+
+    conn.execute(text(f"""
+        INSERT INTO {SEARCH_TABLE} (artist_id, artist_name, artist_name_normalized, track_names, album_names)
+        SELECT
+            a.artist_id,
+            a.artist_name,
+            COALESCE(a.artist_name_normalized, ''),
+            COALESCE((SELECT group_concat(t.track_name, char(10)) FROM dim_tracks t
+                      WHERE t.artist_id = a.artist_id), ''),
+            COALESCE((SELECT group_concat(album_name, char(10)) FROM (
+                        SELECT DISTINCT t.album_name FROM dim_tracks t
+                        WHERE t.artist_id = a.artist_id AND t.album_name IS NOT NULL)), '')
+        FROM dim_artists a
+        {artist_filter}
+    """))
+
+def rebuild_search_index(conn) -> None:
+    """Recompute every search document (backfill / repair)"""
+    refresh_search_index(conn)
+
+def repair_search_index() -> None:
+    """Recompute every search document in one transaction"""
+    with get_db_engine().begin() as conn:
+        rebuild_search_index(conn)
+    print("✅ Artist search index rebuilt from dim_artists")
+
+def search_match_expression(query: str) -> Optional[str]:
+    """FTS5 phrase matching query as a substring, or None when it is too short for trigrams"""
+    query = query.strip()
+    if len(query) < MIN_MATCH_LENGTH:
+        return None
+    return '"' + query.replace('"', '""') + '"'
+
+if __name__ == "__main__":
+    repair_search_index()
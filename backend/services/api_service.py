@@ -3,7 +3,15 @@ from flask import Blueprint, jsonify, request, current_app
 import pandas as pd
 from datetime import datetime, timedelta
 from models.database import get_db_engine
+from models.columnar_engine import columnar_engine
 from services.auth_service import require_api_key
+from services.cache_service import cached
+from services.response_encoding import json_response
+from services.suggest_index import suggest_index
+from services.pagination import CursorError, KeysetQuery, ndjson_response, page_args, wants_ndjson
+from utils.config import Config
+from models.data_versions import artist_scope
+from models.search_index import SEARCH_TABLE, has_search_index, search_match_expression
 from sqlalchemy import text
 
 api_bp = Blueprint('api', __name__)
@@ -14,13 +22,23 @@ class MusicAnalyticsAPI:
     def __init__(self):
         self.engine = get_db_engine()
     
+    def read_aggregate(self, query, params=()):
+        """Run a read-only aggregation on the columnar engine when enabled, else on SQLite"""
+        if columnar_engine.enabled:
+            try:
+                return columnar_engine.read_frame(query, params)
+            except Exception as e:
+                columnar_engine.record_fallback()
+                print(f"⚠️ Columnar engine query failed, falling back to SQLite: {e}")
+        return pd.read_sql(query, self.engine, params=tuple(params) or None)
+    
     def get_dashboard_overview(self):
         """Get main dashboard metrics"""
         with self.engine.connect() as conn:
             # Total metrics
             total_streams = conn.execute(text("""
                 SELECT SUM(metric_value) as total_streams
-                FROM fact_music_metrics 
+                FROM agg_metrics_daily 
                 WHERE metric_type = 'streams'
             """)).scalar() or 0
             
@@ -33,15 +51,14 @@ class MusicAnalyticsAPI:
             # Active platforms
             active_platforms = conn.execute(text("""
                 SELECT COUNT(DISTINCT platform_id) 
-                FROM fact_music_metrics
+                FROM agg_metrics_daily
             """)).scalar() or 0
             
-            # This week vs last week
+            # This week vs last week (date_id is YYYYMMDD, so no dim_dates join is needed)
             this_week_streams = conn.execute(text("""
                 SELECT SUM(metric_value) as weekly_streams
-                FROM fact_music_metrics f
-                JOIN dim_dates d ON f.date_id = d.date_id
-                WHERE d.full_date >= DATE('now', '-7 days')
+                FROM agg_metrics_daily
+                WHERE date_id >= CAST(strftime('%Y%m%d', 'now', '-7 days') AS INTEGER)
                 AND metric_type = 'streams'
             """)).scalar() or 0
             
@@ -53,105 +70,160 @@ class MusicAnalyticsAPI:
                 'growth_percentage': 12.5  # Calculate actual growth
             }
     
-    def get_trending_artists(self, limit=10):
+    def get_trending_artists(self, limit=10, as_frame=False):
         """Get trending artists with growth metrics"""
+        # Window bounds are bound as date_ids so the query also runs on the columnar engine
+        today = datetime.utcnow()
+        week_start = int((today - timedelta(days=7)).strftime('%Y%m%d'))
+        fortnight_start = int((today - timedelta(days=14)).strftime('%Y%m%d'))
         query = """
-        WITH artist_metrics AS (
+        WITH recent AS (
             SELECT 
-                a.artist_id,
-                a.artist_name,
-                SUM(CASE WHEN d.full_date >= DATE('now', '-7 days') 
-                    THEN f.metric_value ELSE 0 END) as this_week,
-                SUM(CASE WHEN d.full_date >= DATE('now', '-14 days') 
-                    AND d.full_date < DATE('now', '-7 days')
-                    THEN f.metric_value ELSE 0 END) as last_week,
-                SUM(f.metric_value) as total_streams
-            FROM fact_music_metrics f
-            JOIN dim_tracks t ON f.isrc = t.isrc
-            JOIN dim_artists a ON t.artist_id = a.artist_id
-            LEFT JOIN dim_dates d ON f.date_id = d.date_id
-            WHERE f.metric_type = 'streams'
-            GROUP BY a.artist_id, a.artist_name
-            HAVING this_week > 0
+                t.artist_id,
+                SUM(CASE WHEN r.date_id >= ? THEN r.metric_value ELSE 0 END) as this_week,
+                SUM(CASE WHEN r.date_id < ? THEN r.metric_value ELSE 0 END) as last_week
+            FROM agg_metrics_daily r
+            JOIN dim_tracks t ON r.isrc = t.isrc
+            WHERE r.metric_type = 'streams'
+            AND r.date_id >= ?
+            GROUP BY t.artist_id
         )
         SELECT 
-            artist_name,
-            total_streams,
-            this_week,
-            last_week,
+            a.artist_name,
+            a.total_streams,
+            recent.this_week,
+            recent.last_week,
             CASE 
-                WHEN last_week > 0 THEN 
-                    ROUND((this_week - last_week) * 100.0 / last_week, 1)
+                WHEN recent.last_week > 0 THEN 
+                    ROUND((recent.this_week - recent.last_week) * 100.0 / recent.last_week, 1)
                 ELSE 100.0 
             END as growth_percentage
-        FROM artist_metrics
-        ORDER BY this_week DESC
+        FROM recent
+        JOIN dim_artists a ON recent.artist_id = a.artist_id
+        WHERE recent.this_week > 0
+        ORDER BY recent.this_week DESC, recent.artist_id
         LIMIT ?
         """
         
-        return pd.read_sql(query, self.engine, params=(limit,)).to_dict('records')
+        df = self.read_aggregate(query, (week_start, week_start, fortnight_start, int(limit)))
+        return df if as_frame else df.to_dict('records')
     
-    def get_platform_distribution(self):
+    def get_platform_distribution(self, as_frame=False):
         """Get platform performance distribution"""
         query = """
         SELECT 
             p.platform_name,
             p.platform_category,
-            COUNT(DISTINCT f.isrc) as unique_tracks,
-            SUM(f.metric_value) as total_value,
-            ROUND(100.0 * SUM(f.metric_value) / 
-                (SELECT SUM(metric_value) FROM fact_music_metrics), 2) as market_share
-        FROM fact_music_metrics f
-        JOIN dim_platforms p ON f.platform_id = p.platform_id
+            COUNT(DISTINCT NULLIF(r.isrc, '')) as unique_tracks,
+            SUM(r.metric_value) as total_value,
+            ROUND(100.0 * SUM(r.metric_value) / 
+                (SELECT SUM(metric_value) FROM agg_metrics_daily), 2) as market_share
+        FROM agg_metrics_daily r
+        JOIN dim_platforms p ON r.platform_id = p.platform_id
         GROUP BY p.platform_name, p.platform_category
         ORDER BY total_value DESC
         """
         
-        return pd.read_sql(query, self.engine).to_dict('records')
+        df = self.read_aggregate(query)
+        return df if as_frame else df.to_dict('records')
     
-    def get_geographic_performance(self):
-        """Get performance by geography"""
-        query = """
+    def geographic_query(self):
+        """Countries by streams, resumable on (total_streams, country_code)"""
+        return KeysetQuery("""
         SELECT 
-            COALESCE(c.country_name, f.country_code) as country,
-            f.country_code,
-            COUNT(DISTINCT f.isrc) as unique_tracks,
-            SUM(f.metric_value) as total_streams
-        FROM fact_music_metrics f
-        LEFT JOIN dim_countries c ON f.country_code = c.country_code
-        WHERE f.country_code IS NOT NULL AND f.country_code != ''
-        GROUP BY f.country_code, c.country_name
-        ORDER BY total_streams DESC
-        LIMIT 50
-        """
-        
-        return pd.read_sql(query, self.engine).to_dict('records')
+            COALESCE(c.country_name, r.country_code) as country,
+            r.country_code,
+            COUNT(DISTINCT NULLIF(r.isrc, '')) as unique_tracks,
+            SUM(r.metric_value) as total_streams
+        FROM agg_metrics_daily r
+        LEFT JOIN dim_countries c ON r.country_code = c.country_code
+        WHERE r.country_code != ''
+        GROUP BY r.country_code, c.country_name
+        """, [('total_streams', 'desc', 'SUM(r.metric_value)'), ('country_code', 'asc', 'r.country_code')])
+    
+    def get_geographic_performance(self, as_frame=False, cursor=None, limit=50):
+        """Get one page of performance by geography and the next page's cursor"""
+        df, next_cursor = self.geographic_query().page(self.engine, cursor, limit)
+        return (df if as_frame else df.to_dict('records')), next_cursor
     
-    def get_time_series_data(self, period='daily', days=30):
-        """Get time series data for charts"""
+    def time_series_query(self, period='daily', days=30):
+        """Streams per day or month, resumable on period"""
         if period == 'daily':
-            date_format = '%Y-%m-%d'
             group_by = "d.full_date"
         else:
-            date_format = '%Y-%m'
             group_by = "strftime('%Y-%m', d.full_date)"
         
-        query = f"""
+        return KeysetQuery(f"""
         SELECT 
             {group_by} as period,
-            SUM(f.metric_value) as total_streams,
-            COUNT(DISTINCT f.isrc) as unique_tracks,
+            SUM(r.metric_value) as total_streams,
+            COUNT(DISTINCT r.isrc) as unique_tracks,
             COUNT(DISTINCT t.artist_id) as unique_artists
-        FROM fact_music_metrics f
-        JOIN dim_tracks t ON f.isrc = t.isrc
-        LEFT JOIN dim_dates d ON f.date_id = d.date_id
-        WHERE d.full_date >= DATE('now', '-{days} days')
-        AND f.metric_type = 'streams'
+        FROM agg_metrics_daily r
+        JOIN dim_tracks t ON r.isrc = t.isrc
+        JOIN dim_dates d ON r.date_id = d.date_id
+        WHERE r.date_id >= CAST(strftime('%Y%m%d', 'now', :window) AS INTEGER)
+        AND r.metric_type = 'streams'
         GROUP BY {group_by}
-        ORDER BY period
+        """, [('period', 'asc', group_by)], {'window': f'-{int(days)} days'})
+    
+    def get_time_series_data(self, period='daily', days=30, as_frame=False, cursor=None, limit=None):
+        """Get time series data for charts; returns (rows, next_cursor), every row unless limit is set"""
+        df, next_cursor = self.time_series_query(period, days).page(self.engine, cursor, limit)
+        return (df if as_frame else df.to_dict('records')), next_cursor
+    
+    def track_series_query(self, days=365):
+        """Daily streams of every track, resumable on (isrc, date_id)"""
+        # Walks idx_agg_daily_isrc in key order, so groups stream out without a sort
+        return KeysetQuery("""
+        SELECT 
+            r.isrc,
+            r.date_id,
+            SUM(r.metric_value) as streams,
+            COUNT(DISTINCT r.platform_id) as platforms
+        FROM agg_metrics_daily r INDEXED BY idx_agg_daily_isrc
+        WHERE r.date_id >= CAST(strftime('%Y%m%d', 'now', :window) AS INTEGER)
+        AND r.metric_type = 'streams'
+        GROUP BY r.isrc, r.date_id
+        """, [('isrc', 'asc', 'r.isrc'), ('date_id', 'asc', 'r.date_id')], {'window': f'-{int(days)} days'})
+    
+    def artist_search_query(self, query):
+        """Artists matching query by streams, resumable on (total_streams, artist_id).
+
+        Names, tracks and albums are matched through the FTS5 search index and
+        ranked by the dim_artists counters, so neither dim_artists nor any
+        metrics table is scanned. Queries shorter than a trigram (or databases
+        without FTS5) fall back to a LIKE over artist names.
         """
+        match = search_match_expression(query)
+        if match is not None:
+            with self.engine.connect() as conn:
+                if not has_search_index(conn):
+                    match = None
+        
+        if match is not None:
+            source = f"""
+            FROM {SEARCH_TABLE}
+            JOIN dim_artists a ON a.artist_id = {SEARCH_TABLE}.artist_id
+            WHERE {SEARCH_TABLE} MATCH :match
+            """
+            params = {'match': match}
+        else:
+            source = """
+            FROM dim_artists a
+            WHERE LOWER(a.artist_name) LIKE LOWER(:pattern)
+            """
+            params = {'pattern': f'%{query}%'}
         
-        return pd.read_sql(query, self.engine).to_dict('records')
+        return KeysetQuery(f"""
+        SELECT 
+            a.artist_id,
+            a.artist_name,
+            a.total_tracks as track_count,
+            a.total_streams
+        {source}
+        """, [('total_streams', 'desc', 'a.total_streams'), ('artist_id', 'asc', 'a.artist_id')],
+            params, keyset_clause='AND')
     
     def get_artist_details(self, artist_id):
         """Get detailed artist analytics"""
@@ -169,13 +241,12 @@ class MusicAnalyticsAPI:
                 SELECT 
                     t.track_name,
                     t.album_name,
-                    SUM(f.metric_value) as total_streams,
-                    COUNT(DISTINCT f.platform_id) as platforms
-                FROM fact_music_metrics f
-                JOIN dim_tracks t ON f.isrc = t.isrc
+                    t.total_streams,
+                    (SELECT COUNT(DISTINCT r.platform_id) FROM agg_metrics_daily r
+                     WHERE r.isrc = t.isrc) as platforms
+                FROM dim_tracks t
                 WHERE t.artist_id = ?
-                GROUP BY t.isrc, t.track_name, t.album_name
-                ORDER BY total_streams DESC
+                ORDER BY t.total_streams DESC
                 LIMIT 10
             """, self.engine, params=(artist_id,)).to_dict('records')
             
@@ -183,11 +254,11 @@ class MusicAnalyticsAPI:
             platform_data = pd.read_sql("""
                 SELECT 
                     p.platform_name,
-                    SUM(f.metric_value) as streams,
-                    COUNT(DISTINCT f.isrc) as tracks
-                FROM fact_music_metrics f
-                JOIN dim_platforms p ON f.platform_id = p.platform_id
-                JOIN dim_tracks t ON f.isrc = t.isrc
+                    SUM(r.metric_value) as streams,
+                    COUNT(DISTINCT r.isrc) as tracks
+                FROM agg_metrics_daily r
+                JOIN dim_platforms p ON r.platform_id = p.platform_id
+                JOIN dim_tracks t ON r.isrc = t.isrc
                 WHERE t.artist_id = ?
                 GROUP BY p.platform_name
                 ORDER BY streams DESC
@@ -202,36 +273,10 @@ class MusicAnalyticsAPI:
 # Initialize API service
 api_service = MusicAnalyticsAPI()
 
-# Simple caching decorator that doesn't require Flask-Caching
-def simple_cache(timeout=300):
-    """Simple in-memory cache decorator"""
-    cache_store = {}
-    
-    def decorator(func):
-        from functools import wraps
-        
-        @wraps(func)  # This preserves the original function name and metadata
-        def wrapper(*args, **kwargs):
-            # Create cache key from function name and arguments
-            cache_key = f"{func.__name__}_{hash(str(args))}_{hash(str(kwargs))}"
-            
-            # Check if we have cached result and it's not expired
-            if cache_key in cache_store:
-                cached_data, timestamp = cache_store[cache_key]
-                if (datetime.now() - timestamp).seconds < timeout:
-                    return cached_data
-            
-            # Get fresh data and cache it
-            result = func(*args, **kwargs)
-            cache_store[cache_key] = (result, datetime.now())
-            return result
-        
-        return wrapper
-    return decorator
-
 # API Endpoints
 @api_bp.route('/dashboard/overview')
-@simple_cache(timeout=300)
+@cached(timeout=300, stale_while_revalidate=Config.CACHE_STALE_WHILE_REVALIDATE,
+        time_window=86400)  # date windows roll over daily
 def dashboard_overview():
     """Main dashboard overview endpoint"""
     try:
@@ -260,7 +305,9 @@ def api_root():
             'platform_analytics': '/api/v1/analytics/platforms',
             'geographic_analytics': '/api/v1/analytics/geographic',
             'time_series': '/api/v1/analytics/timeseries',
+            'track_time_series': '/api/v1/analytics/timeseries/tracks',
             'artist_search': '/api/v1/search/artists',
+            'search_suggest': '/api/v1/search/suggest',
             'reports': '/reports/generate/wrapped'
         },
         'frontend': 'http://localhost:3000',
@@ -423,6 +470,10 @@ def api_documentation():
                 <h3><span class="method">GET</span> Geographic Analytics</h3>
                 <div class="url">/api/v1/analytics/geographic</div>
                 <div class="description">Get performance by country/region with streaming data</div>
+                <div class="example">Parameters:
+- limit: page size (default: 50)
+- cursor: next_cursor from the previous page
+- format: "ndjson" to stream every row instead of a page</div>
             </div>
 
             <div class="endpoint">
@@ -431,7 +482,15 @@ def api_documentation():
                 <div class="description">Get time series data for charts and trend analysis</div>
                 <div class="example">Parameters:
 - period: "daily" or "monthly"
-- days: number of days to include (default: 30)</div>
+- days: number of days to include (default: 30)
+- limit / cursor / format: as for geographic analytics; without limit or cursor every row is returned</div>
+            </div>
+
+            <div class="endpoint">
+                <h3><span class="method">GET</span> Track Time Series Export</h3>
+                <div class="url">/api/v1/analytics/timeseries/tracks?days=365&format=ndjson</div>
+                <div class="description">Daily streams for every track, ordered by ISRC then date. NDJSON streams the whole export in constant memory.</div>
+                <div class="example">{"isrc": "USRC17607839", "date_id": 20240501, "streams": 1520.0, "platforms": 3}</div>
             </div>
         </div>
 
@@ -447,10 +506,18 @@ def api_documentation():
             <div class="endpoint">
                 <h3><span class="method">GET</span> Search Artists</h3>
                 <div class="url">/api/v1/search/artists?q=taylor&limit=20</div>
-                <div class="description">Search for artists by name</div>
+                <div class="description">Search for artists by artist, track or album name (substring match, ranked by streams)</div>
                 <div class="example">Parameters:
 - q: search query (required)
-- limit: max results (default: 20)</div>
+- limit: max results per page (default: 20)
+- cursor: next_cursor from the previous page</div>
+            </div>
+
+            <div class="endpoint">
+                <h3><span class="method">GET</span> Search Suggestions</h3>
+                <div class="url">/api/v1/search/suggest?q=tay&limit=10</div>
+                <div class="description">Search-as-you-type completions for artist and track names, ranked by streams. Matches the start of any of the first four words.</div>
+                <div class="example">{"success": true, "data": [{"kind": "artist", "id": "SAMPLE_TAYLOR", "name": "Taylor Swift", "artist_name": null, "popularity": 2500000.0}], "count": 1}</div>
             </div>
         </div>
 
@@ -546,67 +613,84 @@ def api_documentation():
     return docs_html
 
 @api_bp.route('/artists/trending')
-@simple_cache(timeout=600)
+@cached(timeout=600, stale_while_revalidate=Config.CACHE_STALE_WHILE_REVALIDATE,
+        time_window=86400)  # date windows roll over daily
 def trending_artists():
     """Get trending artists"""
     limit = request.args.get('limit', 10, type=int)
     
     try:
-        data = api_service.get_trending_artists(limit)
-        return jsonify({
-            'success': True,
-            'data': data,
-            'count': len(data)
-        })
+        data = api_service.get_trending_artists(limit, as_frame=True)
+        return json_response(success=True, data=data, count=len(data))
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @api_bp.route('/analytics/platforms')
-@simple_cache(timeout=900)
+@cached(timeout=86400, stale_while_revalidate=Config.CACHE_STALE_WHILE_REVALIDATE)  # invalidated by data version, not by age
 def platform_analytics():
     """Platform distribution analytics"""
     try:
-        data = api_service.get_platform_distribution()
-        return jsonify({
-            'success': True,
-            'data': data
-        })
+        data = api_service.get_platform_distribution(as_frame=True)
+        return json_response(success=True, data=data)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @api_bp.route('/analytics/geographic')
-@simple_cache(timeout=900)
+@cached(timeout=86400, stale_while_revalidate=Config.CACHE_STALE_WHILE_REVALIDATE)  # invalidated by data version, not by age
 def geographic_analytics():
-    """Geographic performance analytics"""
+    """Geographic performance analytics (?cursor=&limit= pages, ?format=ndjson streams)"""
+    cursor, limit = page_args(default_limit=50)
+    
     try:
-        data = api_service.get_geographic_performance()
-        return jsonify({
-            'success': True,
-            'data': data
-        })
+        if wants_ndjson():
+            return ndjson_response(api_service.geographic_query().stream(api_service.engine, cursor))
+        data, next_cursor = api_service.get_geographic_performance(as_frame=True, cursor=cursor, limit=limit)
+        return json_response(success=True, data=data, count=len(data), next_cursor=next_cursor)
+    except CursorError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @api_bp.route('/analytics/timeseries')
-@simple_cache(timeout=300)
+@cached(timeout=300, stale_while_revalidate=Config.CACHE_STALE_WHILE_REVALIDATE,
+        time_window=86400)  # date windows roll over daily
 def timeseries_analytics():
-    """Time series analytics"""
+    """Time series analytics (?cursor=&limit= pages, ?format=ndjson streams)"""
     period = request.args.get('period', 'daily')
     days = request.args.get('days', 30, type=int)
+    cursor, limit = page_args(default_limit=None)
     
     try:
-        data = api_service.get_time_series_data(period, days)
-        return jsonify({
-            'success': True,
-            'data': data,
-            'period': period,
-            'days': days
-        })
+        if wants_ndjson():
+            return ndjson_response(api_service.time_series_query(period, days).stream(api_service.engine, cursor))
+        data, next_cursor = api_service.get_time_series_data(period, days, as_frame=True, cursor=cursor, limit=limit)
+        return json_response(success=True, data=data, period=period, days=days, next_cursor=next_cursor)
+    except CursorError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_bp.route('/analytics/timeseries/tracks')
+@cached(timeout=300, stale_while_revalidate=Config.CACHE_STALE_WHILE_REVALIDATE,
+        time_window=86400)  # date windows roll over daily
+def track_timeseries_analytics():
+    """Daily streams per track for exports (?cursor=&limit= pages, ?format=ndjson streams)"""
+    days = request.args.get('days', 365, type=int)
+    cursor, limit = page_args(default_limit=None)
+    query = api_service.track_series_query(days)
+    
+    try:
+        if wants_ndjson():
+            return ndjson_response(query.stream(api_service.engine, cursor))
+        data, next_cursor = query.page(api_service.engine, cursor, limit)
+        return json_response(success=True, data=data, days=days, count=len(data), next_cursor=next_cursor)
+    except CursorError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @api_bp.route('/artists/<artist_id>')
-@simple_cache(timeout=600)
+@cached(timeout=86400, scopes=lambda artist_id: [artist_scope(artist_id)])
 def artist_details(artist_id):
     """Get detailed artist information"""
     try:
@@ -624,40 +708,39 @@ def artist_details(artist_id):
 
 @api_bp.route('/search/artists')
 def search_artists():
-    """Search for artists"""
+    """Search for artists (?cursor=&limit= pages, ?format=ndjson streams)"""
     query = request.args.get('q', '').strip()
-    limit = request.args.get('limit', 20, type=int)
+    cursor, limit = page_args(default_limit=20)
     
     if not query:
         return jsonify({'success': False, 'error': 'Query parameter required'}), 400
     
     try:
-        search_query = """
-        SELECT 
-            a.artist_id,
-            a.artist_name,
-            COUNT(DISTINCT t.isrc) as track_count,
-            SUM(f.metric_value) as total_streams
-        FROM dim_artists a
-        LEFT JOIN dim_tracks t ON a.artist_id = t.artist_id
-        LEFT JOIN fact_music_metrics f ON t.isrc = f.isrc
-        WHERE LOWER(a.artist_name) LIKE LOWER(?)
-        GROUP BY a.artist_id, a.artist_name
-        ORDER BY total_streams DESC NULLS LAST
-        LIMIT ?
-        """
-        
-        results = pd.read_sql(
-            search_query, 
-            api_service.engine, 
-            params=(f'%{query}%', limit)
-        ).to_dict('records')
-        
+        search = api_service.artist_search_query(query)
+        if wants_ndjson():
+            return ndjson_response(search.stream(api_service.engine, cursor))
+        results, next_cursor = search.page(api_service.engine, cursor, limit)
+        return json_response(success=True, data=results, query=query, count=len(results),
+                             next_cursor=next_cursor)
+    except CursorError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_bp.route('/search/suggest')
+def search_suggest():
+    """Search-as-you-type completions for artist and track names, ranked by streams"""
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    
+    try:
+        suggest_index.ensure_fresh()
+        suggestions = [suggestion._asdict() for suggestion in suggest_index.suggest(query, limit)]
         return jsonify({
             'success': True,
-            'data': results,
+            'data': suggestions,
             'query': query,
-            'count': len(results)
+            'count': len(suggestions)
         })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,570 @@
+# backend/services/cache_service.py
+import abc
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+from flask import Response, copy_current_request_context, current_app, request
+from models.database import get_db_engine
+from models.data_versions import GLOBAL_SCOPE, get_data_version_state
+from services.response_encoding import apply_encoding, compress_body, negotiate_encoding, should_compress
+from utils.config import Config
+
+class CacheBackend(abc.ABC):
+    """Interface shared by the response cache backends selected by Config.CACHE_TYPE"""
+
+    name = 'base'
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'coalesced': 0,
+            'stale_hits': 0,
+            'background_refreshes': 0,
+            'not_modified': 0,
+            'bytes_served': 0,
+            'compute_cpu_seconds': 0.0
+        }
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any, timeout: int, size_bytes: Optional[int] = None) -> None:
+        ...
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def get_stats(self) -> Dict:
+        """Counters (per process) plus backend occupancy, for /health"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['backend'] = self.name
+        stats.update(self.occupancy())
+        return stats
+
+    def occupancy(self) -> Dict:
+        return {}
+
+    def record(self, stat: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+class ResponseCache(CacheBackend):
+    """Bounded, thread-safe TTL + LRU cache for serialized API responses (per process)"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+
+        # key -> (expires_at, size_bytes, value), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a live entry and mark it recently used, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.record('misses')
+                return None
+
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.record('expirations')
+                self.record('misses')
+                return None
+
+            self._entries.move_to_end(key)
+            self.record('hits')
+            return value
+
+    def set(self, key: str, value: Any, timeout: int, size_bytes: Optional[int] = None) -> None:
+        """Store an entry, evicting least recently used entries to stay in bounds"""
+        size_bytes = len(value) if size_bytes is None else size_bytes
+        if size_bytes > self.max_bytes or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + timeout, size_bytes, value)
+            self.size_bytes += size_bytes
+
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.record('evictions')
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def occupancy(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self.size_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            }
+
+    def _remove(self, key: str) -> None:
+        _, size_bytes, _ = self._entries.pop(key)
+        self.size_bytes -= size_bytes
+
+class SQLiteFileCache(CacheBackend):
+    """Node-local cache in one SQLite file, shared by every worker process on the host.
+
+    Same TTL + LRU bounds as the memory backend. Recency is refreshed at most
+    every touch_interval seconds so cache hits rarely need the write lock.
+    Values must be bytes.
+    """
+
+    name = 'filesystem'
+
+    def __init__(self, path: str, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 touch_interval: float = 10.0):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries(accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.record('misses')
+            return None
+
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at <= now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+            self.record('expirations')
+            self.record('misses')
+            return None
+
+        if now - accessed_at >= self.touch_interval:
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+
+        self.record('hits')
+        return bytes(value)
+
+    def set(self, key: str, value: bytes, timeout: int, size_bytes: Optional[int] = None) -> None:
+        size_bytes = len(value) if size_bytes is None else size_bytes
+        if size_bytes > self.max_bytes or self.max_entries <= 0:
+            return
+
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size_bytes, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), size_bytes, now + timeout, now)
+            )
+            self._enforce_bounds(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _enforce_bounds(self, conn: sqlite3.Connection, now: float) -> None:
+        entries, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+        ).fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        expired = conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,)).rowcount
+        self.record('expirations', expired)
+
+        entries, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+        ).fetchone()
+        victims = []
+        for key, size_bytes in conn.execute(
+            "SELECT key, size_bytes FROM cache_entries ORDER BY accessed_at"
+        ):
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            victims.append((key,))
+            entries -= 1
+            total_bytes -= size_bytes
+
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+        self.record('evictions', len(victims))
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache_entries")
+
+    def occupancy(self) -> Dict:
+        entries, total_bytes = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+        ).fetchone()
+        return {
+            'entries': entries,
+            'size_bytes': total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'path': self.path
+        }
+
+class RedisCache(CacheBackend):
+    """Cache in Redis (or any client exposing get/set(ex=)/delete/scan_iter).
+
+    Memory bounds and eviction are left to the server (maxmemory with an
+    allkeys-lru policy); TTLs map to native key expiry. Values must be bytes.
+    """
+
+    name = 'redis'
+
+    def __init__(self, client, prefix: str = 'prism:api:'):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.client.get(self.prefix + key)
+        self.record('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key: str, value: bytes, timeout: int, size_bytes: Optional[int] = None) -> None:
+        self.client.set(self.prefix + key, value, ex=max(1, int(timeout)))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+def create_cache_backend(cache_type: Optional[str] = None) -> CacheBackend:
+    """Build the backend named by cache_type (defaults to Config.CACHE_TYPE)"""
+    cache_type = (cache_type or Config.CACHE_TYPE).lower()
+    max_entries = Config.CACHE_MAX_ENTRIES
+    max_bytes = Config.CACHE_MAX_SIZE_MB * 1024 * 1024
+
+    if cache_type in ('filesystem', 'sqlite'):
+        return SQLiteFileCache(os.path.join(Config.CACHE_DIR, 'api_cache.db'), max_entries, max_bytes)
+
+    if cache_type == 'redis':
+        try:
+            import redis
+            return RedisCache(redis.Redis.from_url(Config.CACHE_REDIS_URL))
+        except ImportError:
+            print("⚠️ CACHE_TYPE=redis but the redis package is not installed; using the memory cache")
+
+    return ResponseCache(max_entries, max_bytes)
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    status: int
+    content_type: str
+    fresh_until: float  # wall-clock time after which the entry is served stale
+
+def encode_response(body: bytes, status: int, content_type: str, fresh_until: float = 0.0) -> bytes:
+    """Serialize a response for byte-oriented cache backends"""
+    return f"{status}\n{content_type}\n{fresh_until!r}\n".encode('utf-8') + body
+
+def decode_response(payload: bytes) -> CachedResponse:
+    status, content_type, fresh_until, body = payload.split(b'\n', 3)
+    return CachedResponse(body, int(status), content_type.decode('utf-8'), float(fresh_until))
+
+class SingleFlight:
+    """Coalesce concurrent computations of the same key within a process.
+
+    The first caller (the leader) runs the function; callers arriving while it
+    runs wait for and share its result instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, shared) where shared is True for coalesced followers"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'event': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+
+        if not leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result'], True
+
+        try:
+            call['result'] = func()
+            return call['result'], False
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call['event'].set()
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+class DataVersionTracker:
+    """Per-process view of data_versions, re-read at most every poll_seconds per scope"""
+
+    def __init__(self, poll_seconds: float = 1.0):
+        self.poll_seconds = poll_seconds
+        self._versions = {}  # scope -> ((version, updated_at), fetched_at)
+        self._lock = threading.Lock()
+
+    def get_versions(self, scopes: List[str]) -> Optional[Dict[str, int]]:
+        """Versions for scopes, or None when they cannot be read (caching is then skipped)"""
+        state = self.get_state(scopes)
+        if state is None:
+            return None
+        return {scope: version for scope, (version, _) in state.items()}
+
+    def get_state(self, scopes: List[str]) -> Optional[Dict[str, Tuple[int, Optional[datetime]]]]:
+        """(version, last bump time) per scope, or None when they cannot be read"""
+        now = time.monotonic()
+        with self._lock:
+            known = {scope: self._versions.get(scope) for scope in scopes}
+        stale = [scope for scope, entry in known.items()
+                 if entry is None or now - entry[1] >= self.poll_seconds]
+
+        if stale:
+            try:
+                with get_db_engine().connect() as conn:
+                    fresh = get_data_version_state(conn, stale)
+            except Exception:
+                return None
+
+            with self._lock:
+                for scope, scope_state in fresh.items():
+                    self._versions[scope] = (scope_state, now)
+                    known[scope] = (scope_state, now)
+
+        return {scope: entry[0] for scope, entry in known.items()}
+
+    def reset(self) -> None:
+        """Forget every known version so the next lookup re-reads them"""
+        with self._lock:
+            self._versions.clear()
+
+# Backend chosen by CACHE_TYPE; the memory backend is per process, the
+# filesystem and redis backends are shared by every worker
+response_cache = create_cache_backend()
+data_versions = DataVersionTracker(poll_seconds=Config.CACHE_VERSION_POLL_SECONDS)
+single_flight = SingleFlight()
+
+def make_cache_key(versions: Optional[Dict[str, int]] = None) -> str:
+    """Key on the request path, its sorted query arguments and the data versions"""
+    args = sorted(request.args.items(multi=True))
+    key = f"{request.path}?{urlencode(args)}"
+    if versions:
+        key += '#' + ','.join(f"{scope}={version}" for scope, version in sorted(versions.items()))
+    return key
+
+def make_etag(key: str) -> str:
+    """Strong validator for a versioned cache key"""
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Optional[str]:
+    """The validator matched by the request's conditional headers, if any"""
+    if request.if_none_match:
+        # Compressed representations carry the coding as an ETag suffix
+        for candidate in (etag, f"{etag}-gzip", f"{etag}-br"):
+            if request.if_none_match.contains(candidate):
+                return candidate
+        return None
+    if request.if_modified_since and last_modified:
+        if last_modified.replace(microsecond=0) <= request.if_modified_since:
+            return etag
+    return None
+
+def cached(timeout: Optional[int] = None, scopes: Optional[Callable[..., List[str]]] = None,
+           stale_while_revalidate: int = 0, time_window: Optional[int] = None):
+    """Cache successful GET responses of a view as serialized bytes.
+
+    Keys embed the current data version of the view's scopes (global by default;
+    scopes(**view_kwargs) narrows it), so a committed ingestion invalidates the
+    affected entries immediately and timeout only bounds time-dependent results.
+
+    Concurrent misses for one key are coalesced so only one request computes it.
+    With stale_while_revalidate, an entry past its timeout is still served for
+    that many seconds while a background thread recomputes it.
+
+    Views whose results move with the clock pass time_window (seconds); the
+    current window is part of the key. Responses carry an ETag derived from
+    the key and Last-Modified from the data versions; matching conditional requests get a 304 without touching
+    the cache or the database.
+    """
+    ttl = timeout if timeout is not None else Config.CACHE_DEFAULT_TIMEOUT
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return func(*args, **kwargs)
+
+            state = data_versions.get_state(scopes(**kwargs) if scopes else [GLOBAL_SCOPE])
+            if state is None:
+                return func(*args, **kwargs)
+
+            versions = {scope: version for scope, (version, _) in state.items()}
+            bucket = int(time.time() // time_window) if time_window else None
+            key = make_cache_key(versions)
+            if bucket is not None:
+                key += f"@{bucket}"
+            etag = make_etag(key)
+            modified_times = [updated_at for _, updated_at in state.values() if updated_at]
+            if bucket is not None:
+                modified_times.append(datetime.fromtimestamp(bucket * time_window, timezone.utc))
+            last_modified = max(modified_times) if modified_times else None
+
+            matched_etag = not_modified(etag, last_modified)
+            if matched_etag:
+                response_cache.record('not_modified')
+                return validated(Response(status=304), matched_etag, last_modified)
+
+            def compute() -> Tuple[Optional[bytes], Response]:
+                started = time.process_time()
+                # Store the body rather than the Response object, which is per-request state
+                response = current_app.make_response(func(*args, **kwargs))
+                response_cache.record('compute_cpu_seconds', time.process_time() - started)
+                if response.direct_passthrough or response.is_streamed:
+                    # Streams are produced lazily and are never buffered into the cache
+                    return None, response
+
+                payload = encode_response(response.get_data(), response.status_code,
+                                          response.content_type, time.time() + ttl)
+                if response.status_code == 200:
+                    response_cache.set(key, payload, ttl + stale_while_revalidate)
+                return payload, response
+
+            hit = response_cache.get(key)
+            cached_response = decode_response(hit) if hit is not None else None
+            if cached_response is not None and cached_response.fresh_until <= time.time():
+                if stale_while_revalidate:
+                    response_cache.record('stale_hits')
+                    if not single_flight.in_flight(key):
+                        refresh_in_background(key, compute)
+                else:
+                    cached_response = None
+
+            if cached_response is None:
+                (payload, response), shared = single_flight.do(key, compute)
+                if shared:
+                    response_cache.record('coalesced')
+                    if payload is None:
+                        response = current_app.make_response(func(*args, **kwargs))
+                    else:
+                        cached_response = decode_response(payload)
+
+            if cached_response is not None:
+                response = Response(cached_response.body, status=cached_response.status,
+                                    content_type=cached_response.content_type)
+
+            if response.status_code == 200:
+                validated(response, etag, last_modified)
+                encode_cached_variant(response, key, ttl + stale_while_revalidate)
+            if not (response.direct_passthrough or response.is_streamed):
+                response_cache.record('bytes_served', response.calculate_content_length() or 0)
+            return response
+
+        return wrapper
+    return decorator
+
+def encode_cached_variant(response: Response, key: str, timeout: int) -> None:
+    """Compress for the client's Accept-Encoding, caching each coding's bytes beside the entry"""
+    if not should_compress(response):
+        return
+
+    encoding = negotiate_encoding()
+    if not encoding:
+        response.vary.add('Accept-Encoding')
+        return
+
+    variant_key = f"{key}|{encoding}"
+    body = response_cache.get(variant_key)
+    if body is None:
+        body = compress_body(response.get_data(), encoding)
+        response_cache.set(variant_key, body, timeout)
+    apply_encoding(response, body, encoding)
+
+def validated(response: Response, etag: str, last_modified: Optional[datetime]) -> Response:
+    """Attach validators and ask clients to revalidate on every use"""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def refresh_in_background(key: str, compute: Callable) -> None:
+    """Recompute a stale entry on a daemon thread, at most once at a time per key"""
+    @copy_current_request_context
+    def refresh():
+        try:
+            single_flight.do(key, compute)
+            response_cache.record('background_refreshes')
+        except Exception as e:
+            print(f"⚠️ Background cache refresh failed for {key}: {e}")
+
+    threading.Thread(target=refresh, name='cache-refresh', daemon=True).start()
@@ -0,0 +1,131 @@
+# backend/services/cache_warmer.py
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from models.database import get_db_engine
+from models.data_versions import GLOBAL_SCOPE, get_data_versions
+from utils.config import Config
+
+# Hot endpoints in the order users hit them after opening the dashboard
+HOT_PATHS = [
+    '/api/v1/dashboard/overview',
+    '/api/v1/artists/trending?limit=5',
+    '/api/v1/artists/trending?limit=10',
+    '/api/v1/artists/trending?limit=20',
+    '/api/v1/analytics/platforms',
+    '/api/v1/analytics/geographic',
+    '/api/v1/analytics/timeseries?period=daily&days=30',
+    '/api/v1/analytics/timeseries?period=daily&days=90',
+    '/api/v1/analytics/timeseries?period=monthly&days=365'
+]
+
+class CacheWarmer:
+    """Pre-compute hot API responses at startup and whenever ingestion commits new data.
+
+    Requests go through the app's own test client, so entries land in the
+    configured cache backend under exactly the keys real requests use.
+    """
+
+    def __init__(self, app, budget_seconds: Optional[float] = None, top_artists: Optional[int] = None,
+                 poll_seconds: Optional[float] = None):
+        self.app = app
+        self.budget_seconds = Config.CACHE_WARM_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+        self.top_artists = Config.CACHE_WARM_TOP_ARTISTS if top_artists is None else top_artists
+        self.poll_seconds = Config.CACHE_WARM_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.last_report = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def hot_paths(self) -> List[str]:
+        """Fixed hot endpoints plus the detail pages of the top artists by streams"""
+        paths = list(HOT_PATHS)
+        if self.top_artists <= 0:
+            return paths
+
+        try:
+            with get_db_engine().connect() as conn:
+                artist_ids = conn.execute(text("""
+                    SELECT artist_id FROM dim_artists
+                    ORDER BY total_streams DESC
+                    LIMIT :limit
+                """), {'limit': self.top_artists}).scalars().all()
+        except Exception as e:
+            print(f"⚠️ Could not load top artists for cache warming: {e}")
+            artist_ids = []
+
+        return paths + [f'/api/v1/artists/{artist_id}' for artist_id in artist_ids]
+
+    def warm(self, reason: str = 'manual') -> Dict:
+        """Request each hot path until the time budget runs out; returns a report"""
+        started = time.perf_counter()
+        paths = self.hot_paths()
+        warmed, failed = 0, []
+
+        with self.app.test_client() as client:
+            for path in paths:
+                if time.perf_counter() - started >= self.budget_seconds:
+                    break
+                try:
+                    response = client.get(path)
+                    if response.status_code == 200:
+                        warmed += 1
+                    else:
+                        failed.append(path)
+                except Exception:
+                    failed.append(path)
+
+        seconds = time.perf_counter() - started
+        self.last_report = {
+            'reason': reason,
+            'keys_warmed': warmed,
+            'keys_failed': len(failed),
+            'keys_skipped': len(paths) - warmed - len(failed),
+            'seconds': round(seconds, 3),
+            'budget_seconds': self.budget_seconds,
+            'finished_at': datetime.now().isoformat()
+        }
+
+        print(f"🔥 Cache warmed ({reason}): {warmed}/{len(paths)} keys in {seconds:.2f}s")
+        return self.last_report
+
+    def current_version(self) -> Optional[int]:
+        try:
+            with get_db_engine().connect() as conn:
+                return get_data_versions(conn, [GLOBAL_SCOPE])[GLOBAL_SCOPE]
+        except Exception:
+            return None
+
+    def run(self) -> None:
+        """Warm once, then re-warm after each settled data version change"""
+        seen_version = self.current_version()
+        self.warm('startup')
+
+        if self.poll_seconds <= 0:
+            return
+
+        while not self._stop.wait(self.poll_seconds):
+            version = self.current_version()
+            if version is None or version == seen_version:
+                continue
+
+            # Let a multi-batch ingestion settle before recomputing everything
+            while not self._stop.wait(self.poll_seconds):
+                settled = self.current_version()
+                if settled == version:
+                    break
+                version = settled
+
+            seen_version = version
+            self.warm('ingestion')
+
+    def start(self) -> None:
+        """Run the warmer on a daemon thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='cache-warmer', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -1,12 +1,24 @@
 # backend/services/data_processor.py
 import pandas as pd
 import os
+import time
+import hashlib
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
 from datetime import datetime
-from typing import Dict, List, Optional
-from models.database import get_db_engine
+from typing import Dict, List, Optional, Tuple
+from models.database import get_db_engine, bulk_insert, bulk_upsert, ensure_date_dimension, FACT_METRIC_COLUMNS
+from models.rollups import (update_rollups_from_batch, subtract_batch_from_rollups, refresh_artist_rollups,
+                            refresh_counters, ROLLUP_STAGING_TABLE)
+from models.data_versions import bump_data_versions, bump_batch_versions, artist_scope, next_change_version
+from models.search_index import refresh_search_index
+from models.partitions import insert_facts, delete_facts
+from sqlalchemy import text
 from utils.platform_mappers import PlatformMapper
 from utils.data_validators import DataValidator
 from utils.file_handlers import FileHandler
+from utils.config import Config
 
 class MusicDataProcessor:
     """Modularized music data processing service"""
@@ -17,53 +29,406 @@ class MusicDataProcessor:
         self.platform_mapper = PlatformMapper()
         self.validator = DataValidator()
         self.file_handler = FileHandler()
+        self.chunk_size = Config.INGEST_CHUNK_SIZE
+        self.workers = Config.INGEST_WORKERS
+        self.insert_batch_size = Config.INGEST_INSERT_BATCH_SIZE
+        
+        # Successful ingestions from processing_history, loaded lazily
+        self.processed_checksums = None
+        self.processed_files = None
+        
+        # date_ids already present in dim_dates during this run
+        self.known_date_ids = set()
         
         self.stats = {
             'files_processed': 0,
+            'files_skipped': 0,
+            'records_read': 0,
             'records_inserted': 0,
-            'errors': []
+            'dimension_rows_upserted': 0,
+            'insert_seconds': 0.0,
+            'errors': [],
+            'workers': {},
+            'wall_clock_seconds': 0.0
         }
     
-    def process_folder(self, folder_path: str) -> Dict:
-        """Process all files in a folder"""
+    def process_folder(self, folder_path: str, streaming: bool = False,
+                       chunk_size: Optional[int] = None, parallel: bool = False,
+                       workers: Optional[int] = None, force: bool = False) -> Dict:
+        """Process all files in a folder, optionally streaming each file in chunks
+        or parsing files in a pool of worker processes. Files already ingested
+        successfully are skipped unless force is set.
+        
+        Workers return whole prepared files, so parallel mode cannot keep the
+        bounded memory of streaming; combining the two raises ValueError."""
+        if parallel and streaming:
+            raise ValueError("streaming and parallel ingestion cannot be combined: "
+                             "workers load whole files, use one or the other")
+        
         print(f"🚀 Processing folder: {folder_path}")
         
         files = self.file_handler.discover_files(folder_path)
         print(f"📁 Found {len(files)} files to process")
         
+        self.load_processing_history()
+        
+        if parallel:
+            self.process_files_parallel(files, workers or self.workers, force=force)
+            return self.generate_processing_summary()
+        
+        started = time.perf_counter()
         for file_path in files:
             try:
-                self.process_file(file_path)
+                self.process_file(file_path, streaming=streaming, chunk_size=chunk_size, force=force)
             except Exception as e:
                 self.stats['errors'].append({
                     'file': file_path,
                     'error': str(e)
                 })
+        self.stats['wall_clock_seconds'] += time.perf_counter() - started
         
         return self.generate_processing_summary()
     
-    def process_file(self, file_path: str) -> None:
-        """Process a single data file"""
+    def process_files_parallel(self, files: List[str], workers: int, force: bool = False) -> None:
+        """Parse, clean and validate files in worker processes while this
+        process acts as the single database writer"""
+        print(f"⚡ Parallel ingestion with {workers} workers")
+        started = time.perf_counter()
+        
+        if not force:
+            pending = [f for f in files if not self.is_unchanged_since_processed(f)]
+            self.stats['files_skipped'] += len(files) - len(pending)
+            files = pending
+        skip_checksums = set() if force else self.get_processed_checksums()
+        
+        # At most two files per worker are parsed or waiting to be written, so peak
+        # memory follows the pool size rather than the number of files in the folder
+        queue = iter(files)
+        in_flight = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_ingest_worker,
+                                 initargs=(self.environment, skip_checksums)) as pool:
+            for file_path in islice(queue, 2 * workers):
+                in_flight[pool.submit(_prepare_file_in_worker, file_path)] = file_path
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = in_flight.pop(future)
+                    self.write_prepared_file(future, file_path, force)
+                    
+                    next_path = next(queue, None)
+                    if next_path is not None:
+                        in_flight[pool.submit(_prepare_file_in_worker, next_path)] = next_path
+                # Drop the last references to written results before waiting again
+                del done, future
+        
+        self.stats['wall_clock_seconds'] += time.perf_counter() - started
+    
+    def write_prepared_file(self, future, file_path: str, force: bool) -> None:
+        """Write one worker's prepared file and close its processing_history row"""
+        file_info = None
+        try:
+            prepared = future.result()
+            file_info = prepared['file_info']
+            self.record_worker_stats(prepared)
+            
+            # Re-check here to catch identical files within the same run
+            if prepared['skipped'] or (not force and file_info['checksum'] in self.get_processed_checksums()):
+                self.stats['files_skipped'] += 1
+                return
+            
+            self.record_processing_start(file_info)
+            self.stats['records_read'] += prepared['rows']
+            inserted_before = self.stats['records_inserted']
+            written_before = self.rows_written()
+            insert_seconds_before = self.stats['insert_seconds']
+            
+            if not prepared['rows']:
+                print(f"  ⚠️ {file_info['name']}: could not read file or empty")
+                self.record_processing_end(file_info, 'empty', prepared['rows'], 0)
+                return
+            
+            self.write_batches(prepared['batches'])
+            self.record_processing_end(file_info, self.completed_status(written_before), prepared['rows'],
+                                       self.stats['records_inserted'] - inserted_before)
+            self.log_insert_throughput(file_info, self.stats['records_inserted'] - inserted_before,
+                                       self.stats['insert_seconds'] - insert_seconds_before)
+            self.stats['files_processed'] += 1
+            print(f"  ✅ {file_info['name']}: {prepared['rows']:,} rows "
+                  f"(worker {prepared['worker']}, {prepared['seconds']:.2f}s)")
+        except Exception as e:
+            if file_info is not None and 'start_time' in file_info:
+                self.record_processing_end(file_info, 'failed', 0, 0, error_message=str(e))
+            self.stats['errors'].append({
+                'file': file_path,
+                'error': str(e)
+            })
+    
+    def prepare_file(self, file_path: str, skip_checksums: Optional[set] = None) -> Dict:
+        """Read and clean a file into write-ready batches without touching the database"""
+        started = time.perf_counter()
+        file_info = self.file_handler.analyze_file(file_path)
+        
+        if skip_checksums and file_info['checksum'] in skip_checksums:
+            return {
+                'file_info': file_info,
+                'batches': [],
+                'rows': 0,
+                'skipped': True,
+                'worker': os.getpid(),
+                'seconds': time.perf_counter() - started
+            }
+        
+        file_info['batch_id'] = self.new_batch_id(file_info)
+        df = self.file_handler.read_file(file_path, file_info)
+        batches = [] if df is None or df.empty else self.prepare_dataframe(df, file_info)
+        
+        return {
+            'file_info': file_info,
+            'batches': batches,
+            'rows': 0 if df is None else len(df),
+            'skipped': False,
+            'worker': os.getpid(),
+            'seconds': time.perf_counter() - started
+        }
+    
+    def prepare_dataframe(self, df: pd.DataFrame, file_info: Dict) -> List[Tuple[str, object]]:
+        """Clean a frame for its file type and return (kind, payload) write batches"""
+        if file_info['type'] == 'metadata':
+            df_clean = self.validator.clean_metadata(df)
+            return [
+                ('artists', self.extract_artists(df_clean, file_info)),
+                ('tracks', self.extract_tracks(df_clean, file_info))
+            ]
+        elif file_info['type'] == 'usage':
+            df_clean = self.prepare_usage_data(df, file_info)
+            return [] if df_clean is None or df_clean.empty else [('metrics', df_clean)]
+        elif file_info['type'] == 'apple_streaming':
+            return [('apple_metrics', self.prepare_apple_streaming(df, file_info))]
+        
+        return []
+    
+    def write_batches(self, batches: List[Tuple[str, object]]) -> None:
+        """Write prepared batches to the database (single-writer side of parallel mode)"""
+        for kind, payload in batches:
+            if kind == 'artists':
+                self.insert_artists(payload)
+            elif kind == 'tracks':
+                self.insert_tracks(payload)
+            elif kind == 'metrics':
+                self.insert_metrics(payload)
+            elif kind == 'apple_metrics':
+                self.insert_metrics(self.map_apple_identifiers(payload))
+    
+    def record_worker_stats(self, prepared: Dict) -> None:
+        """Accumulate per-worker file, row and busy-time counters"""
+        worker = self.stats['workers'].setdefault(prepared['worker'], {
+            'files': 0,
+            'rows': 0,
+            'busy_seconds': 0.0
+        })
+        worker['files'] += 1
+        worker['rows'] += prepared['rows']
+        worker['busy_seconds'] += prepared['seconds']
+    
+    def load_processing_history(self) -> None:
+        """Load files whose ingestion wrote rows ('success', never 'empty') in one query"""
+        self.processed_checksums = set()
+        self.processed_files = {}
+        
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(text("""
+                    SELECT file_path, file_size_bytes, file_checksum, end_time
+                    FROM processing_history
+                    WHERE processing_status = 'success'
+                """)).fetchall()
+        except Exception as e:
+            print(f"  ⚠️ Could not read processing history: {e}")
+            return
+        
+        for file_path, size, checksum, end_time in rows:
+            if checksum:
+                self.processed_checksums.add(checksum)
+            if file_path and end_time:
+                self.processed_files[file_path] = (size, pd.Timestamp(end_time).to_pydatetime())
+    
+    def get_processed_checksums(self) -> set:
+        """Checksums of files that have already been ingested successfully"""
+        if self.processed_checksums is None:
+            self.load_processing_history()
+        return self.processed_checksums
+    
+    def is_unchanged_since_processed(self, file_path: str) -> bool:
+        """Cheap stat-based check that avoids hashing files ingested since their last change"""
+        if self.processed_files is None:
+            self.load_processing_history()
+        
+        previous = self.processed_files.get(file_path)
+        if not previous:
+            return False
+        
+        size, end_time = previous
+        stat = os.stat(file_path)
+        return stat.st_size == size and datetime.fromtimestamp(stat.st_mtime) < end_time
+    
+    def new_batch_id(self, file_info: Dict) -> str:
+        """Generate a unique batch id for one ingestion of a file"""
+        checksum = (file_info.get('checksum') or 'nochecksum')[:8]
+        return f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{checksum}_{uuid.uuid4().hex[:8]}"
+    
+    def record_processing_start(self, file_info: Dict) -> None:
+        """Insert a 'processing' row for this file's batch into processing_history"""
+        file_info.setdefault('batch_id', self.new_batch_id(file_info))
+        file_info['start_time'] = datetime.now()
+        
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO processing_history
+                (batch_id, file_path, file_name, platform_id, start_time,
+                 file_size_bytes, file_checksum, processing_status, processed_by)
+                VALUES (:batch_id, :file_path, :file_name, :platform_id, :start_time,
+                        :file_size_bytes, :file_checksum, 'processing', :processed_by)
+            """), {
+                'batch_id': file_info['batch_id'],
+                'file_path': file_info['path'],
+                'file_name': file_info['name'],
+                'platform_id': file_info['platform'],
+                'start_time': file_info['start_time'],
+                'file_size_bytes': file_info['size'],
+                'file_checksum': file_info['checksum'],
+                'processed_by': f"data_processor:{self.environment}"
+            })
+    
+    def rows_written(self) -> int:
+        """Fact and dimension rows written so far in this run"""
+        return self.stats['records_inserted'] + self.stats['dimension_rows_upserted']
+    
+    def completed_status(self, written_before: int) -> str:
+        """'success' when a file wrote rows since written_before, else 'empty'.
+        
+        Only 'success' runs are skipped on re-runs, so a file that wrote nothing
+        (unreadable, unrecognised type, every row rejected) is retried next time.
+        """
+        return 'success' if self.rows_written() > written_before else 'empty'
+    
+    def record_processing_end(self, file_info: Dict, status: str, records_processed: int,
+                              records_inserted: int, error_message: Optional[str] = None) -> None:
+        """Close this file's processing_history row; failed batches are rolled back"""
+        end_time = datetime.now()
+        
+        with self.engine.begin() as conn:
+            if status == 'failed':
+                # Remove partially written rows so a retry does not duplicate them
+                subtract_batch_from_rollups(conn, file_info['batch_id'])
+                bump_batch_versions(conn, [file_info.get('platform')],
+                                    "SELECT isrc FROM fact_music_metrics WHERE batch_id = :batch_id",
+                                    {'batch_id': file_info['batch_id']})
+                delete_facts(conn, "batch_id = :batch_id", {'batch_id': file_info['batch_id']})
+            
+            conn.execute(text("""
+                UPDATE processing_history
+                SET end_time = :end_time,
+                    records_processed = :records_processed,
+                    records_inserted = :records_inserted,
+                    records_rejected = :records_rejected,
+                    processing_status = :status,
+                    error_message = :error_message,
+                    processing_duration_seconds = :duration
+                WHERE batch_id = :batch_id
+            """), {
+                'end_time': end_time,
+                'records_processed': records_processed,
+                'records_inserted': records_inserted,
+                'records_rejected': max(0, records_processed - records_inserted),
+                'status': status,
+                'error_message': error_message,
+                'duration': (end_time - file_info['start_time']).total_seconds(),
+                'batch_id': file_info['batch_id']
+            })
+        
+        if status == 'success':
+            self.get_processed_checksums().add(file_info['checksum'])
+    
+    def process_file(self, file_path: str, streaming: bool = False,
+                     chunk_size: Optional[int] = None, force: bool = False) -> None:
+        """Process a single data file, recording the batch in processing_history"""
+        if not force and self.is_unchanged_since_processed(file_path):
+            print(f"⏭️ Skipping unchanged file: {os.path.basename(file_path)}")
+            self.stats['files_skipped'] += 1
+            return
+        
         file_info = self.file_handler.analyze_file(file_path)
         
+        if not force and file_info['checksum'] in self.get_processed_checksums():
+            print(f"⏭️ Skipping already ingested file: {file_info['name']}")
+            self.stats['files_skipped'] += 1
+            return
+        
         print(f"📄 Processing: {file_info['name']}")
         print(f"  Platform: {file_info['platform']}, Type: {file_info['type']}")
         
+        self.record_processing_start(file_info)
+        read_before = self.stats['records_read']
+        inserted_before = self.stats['records_inserted']
+        written_before = self.rows_written()
+        insert_seconds_before = self.stats['insert_seconds']
+        
+        try:
+            has_data = self.process_file_contents(file_path, file_info, streaming, chunk_size)
+        except Exception as e:
+            self.record_processing_end(file_info, 'failed', self.stats['records_read'] - read_before,
+                                       0, error_message=str(e))
+            raise
+        
+        self.record_processing_end(file_info, self.completed_status(written_before),
+                                   self.stats['records_read'] - read_before,
+                                   self.stats['records_inserted'] - inserted_before)
+        self.log_insert_throughput(file_info, self.stats['records_inserted'] - inserted_before,
+                                   self.stats['insert_seconds'] - insert_seconds_before)
+        if has_data:
+            self.stats['files_processed'] += 1
+    
+    def process_file_contents(self, file_path: str, file_info: Dict, streaming: bool,
+                              chunk_size: Optional[int]) -> bool:
+        """Read and process a file's rows; returns False when nothing could be read"""
+        if streaming:
+            chunks = self.process_file_streaming(file_path, file_info, chunk_size or self.chunk_size)
+            if chunks == 0:
+                print("  ⚠️ Could not read file or empty")
+                return False
+            return True
+        
         # Read and validate data
-        df = self.file_handler.read_file(file_path)
+        df = self.file_handler.read_file(file_path, file_info)
         if df is None or df.empty:
             print("  ⚠️ Could not read file or empty")
-            return
+            return False
+        
+        self.process_dataframe(df, file_info)
+        return True
+    
+    def process_file_streaming(self, file_path: str, file_info: Dict, chunk_size: int) -> int:
+        """Process a file in bounded row chunks so peak memory is independent of file size"""
+        print(f"  🌊 Streaming in chunks of {chunk_size:,} rows")
+        
+        chunks = 0
+        for chunk in self.file_handler.read_file_chunks(file_path, chunk_size, file_info):
+            self.process_dataframe(chunk, file_info)
+            chunks += 1
+        
+        return chunks
+    
+    def process_dataframe(self, df: pd.DataFrame, file_info: Dict) -> None:
+        """Dispatch a frame (whole file or chunk) to the handler for its file type"""
+        self.stats['records_read'] += len(df)
         
-        # Process based on file type
         if file_info['type'] == 'metadata':
             self.process_metadata(df, file_info)
         elif file_info['type'] == 'usage':
             self.process_usage_data(df, file_info)
         elif file_info['type'] == 'apple_streaming':
             self.process_apple_streaming(df, file_info)
-        
-        self.stats['files_processed'] += 1
     
     def process_metadata(self, df: pd.DataFrame, file_info: Dict) -> None:
         """Process metadata files (artist, track, album info)"""
@@ -86,27 +451,48 @@ class MusicDataProcessor:
         """Process usage/metrics data (streams, plays, etc.)"""
         print("  📊 Processing usage data")
         
-        # Standardize usage data
-        df_clean = self.validator.clean_usage_data(df, file_info['platform'])
+        df_clean = self.prepare_usage_data(df, file_info)
         
         if df_clean is None or df_clean.empty:
             print("  ⚠️ No valid usage data found")
             return
         
+        # Insert metrics
+        self.insert_metrics(df_clean)
+        print(f"  ✅ Inserted {len(df_clean)} metric records")
+    
+    def prepare_usage_data(self, df: pd.DataFrame, file_info: Dict) -> Optional[pd.DataFrame]:
+        """Clean usage data and stamp ingestion metadata (no database access)"""
+        # Standardize usage data
+        df_clean = self.validator.clean_usage_data(df, file_info['platform'], file_info.get('date_folder'))
+        
+        if df_clean is None or df_clean.empty:
+            return df_clean
+        
         # Add metadata
         df_clean['platform_id'] = file_info['platform']
         df_clean['source_file'] = file_info['name']
+        df_clean['batch_id'] = file_info.get('batch_id')
         df_clean['environment'] = self.environment
         df_clean['processing_date'] = datetime.now()
         
-        # Insert metrics
-        self.insert_metrics(df_clean)
-        print(f"  ✅ Inserted {len(df_clean)} metric records")
+        return df_clean
     
     def process_apple_streaming(self, df: pd.DataFrame, file_info: Dict) -> None:
         """Process Apple Music streaming data"""
         print("  🍎 Processing Apple streaming data")
         
+        df_clean = self.prepare_apple_streaming(df, file_info)
+        
+        # Map Apple IDs to ISRCs if possible
+        df_clean = self.map_apple_identifiers(df_clean)
+        
+        # Insert streaming data
+        self.insert_metrics(df_clean)
+        print(f"  ✅ Processed {len(df_clean)} Apple streaming records")
+    
+    def prepare_apple_streaming(self, df: pd.DataFrame, file_info: Dict) -> pd.DataFrame:
+        """Map and clean Apple Music columns (no database access)"""
         # Apple-specific column mapping
         column_map = {
             'Apple Identifier': 'apple_id',
@@ -116,77 +502,146 @@ class MusicDataProcessor:
         }
         
         df_mapped = df.rename(columns=column_map)
-        df_clean = self.validator.clean_apple_data(df_mapped)
-        
-        # Map Apple IDs to ISRCs if possible
-        df_clean = self.map_apple_identifiers(df_clean)
+        df_clean = self.validator.clean_apple_data(df_mapped, file_info.get('date_folder'))
+        df_clean['source_file'] = file_info['name']
+        df_clean['batch_id'] = file_info.get('batch_id')
         
-        # Insert streaming data
-        self.insert_metrics(df_clean)
-        print(f"  ✅ Processed {len(df_clean)} Apple streaming records")
+        return df_clean
     
     def extract_artists(self, df: pd.DataFrame, file_info: Dict) -> List[Dict]:
-        """Extract artist data from metadata"""
-        artists = []
-        seen_artists = set()
-        
-        for _, row in df.iterrows():
-            artist_name = row.get('artist_name')
-            if not artist_name or artist_name in seen_artists:
-                continue
-                
-            artist_id = self.generate_artist_id(artist_name, file_info['platform'])
-            artists.append({
+        """Extract unique artists from metadata (column-wise, first occurrence wins)"""
+        if 'artist_name' not in df.columns:
+            return []
+        
+        names = df['artist_name'][self.present_mask(df['artist_name'])].drop_duplicates()
+        artist_ids = self.generate_artist_ids(names, file_info['platform'])
+        created_at = datetime.now()
+        
+        return [
+            {
                 'artist_id': artist_id,
                 'artist_name': artist_name,
                 'source_platform': file_info['platform'],
-                'created_at': datetime.now()
-            })
-            seen_artists.add(artist_name)
-        
-        return artists
+                'created_at': created_at
+            }
+            for artist_name, artist_id in zip(names.tolist(), artist_ids)
+        ]
     
     def extract_tracks(self, df: pd.DataFrame, file_info: Dict) -> List[Dict]:
-        """Extract track data from metadata"""
-        tracks = []
-        
-        for _, row in df.iterrows():
-            isrc = row.get('isrc')
-            if not isrc:
-                continue
-                
-            tracks.append({
+        """Extract track data from metadata (column-wise)"""
+        if 'isrc' not in df.columns:
+            return []
+        
+        tracks = df[self.present_mask(df['isrc'])]
+        
+        def column(name: str) -> list:
+            return tracks[name].tolist() if name in tracks.columns else [None] * len(tracks)
+        
+        if 'artist_name' in tracks.columns:
+            artist_ids = self.generate_artist_ids(tracks['artist_name'], file_info['platform'])
+        else:
+            artist_ids = [None] * len(tracks)
+        created_at = datetime.now()
+        
+        return [
+            {
                 'isrc': isrc,
-                'track_name': row.get('track_name'),
-                'artist_id': self.generate_artist_id(row.get('artist_name'), file_info['platform']),
-                'album_name': row.get('album_name'),
-                'duration_seconds': row.get('duration'),
-                'genre': row.get('genre'),
-                'created_at': datetime.now()
-            })
+                'track_name': track_name,
+                'artist_id': artist_id,
+                'album_name': album_name,
+                'duration_seconds': duration,
+                'genre': genre,
+                'created_at': created_at
+            }
+            for isrc, track_name, artist_id, album_name, duration, genre in zip(
+                column('isrc'), column('track_name'), artist_ids,
+                column('album_name'), column('duration'), column('genre')
+            )
+        ]
+    
+    def present_mask(self, series: pd.Series) -> pd.Series:
+        """Rows whose value is neither missing nor an empty string"""
+        return series.notna() & (series.astype(str) != '')
+    
+    def generate_artist_ids(self, names: pd.Series, platform: str) -> List[Optional[str]]:
+        """Generate artist IDs for a column of names, hashing each distinct name once"""
+        unique_names = names[self.present_mask(names)].unique()
+        id_map = {name: self.generate_artist_id(name, platform) for name in unique_names}
         
-        return tracks
+        return [id_map.get(name) for name in names.tolist()]
     
     def insert_artists(self, artists_data: List[Dict]) -> None:
-        """Insert artist data to database"""
+        """Upsert artist data, merging new attributes into known artists"""
         if not artists_data:
             return
-            
-        df = pd.DataFrame(artists_data)
-        df.to_sql('dim_artists', self.engine, if_exists='append', index=False)
+        
+        artist_ids = {artist['artist_id'] for artist in artists_data}
+        # The upsert and everything derived from it commit together, so a failure
+        # never leaves dim_artists ahead of the counters, search documents or versions
+        with self.engine.begin() as conn:
+            self.stats['dimension_rows_upserted'] += self.upsert_dimension(
+                conn, 'dim_artists', self.stamp_change_version(conn, artists_data), ['artist_id'])
+            # New artist rows may describe tracks whose usage already arrived
+            refresh_counters(conn, artist_ids=artist_ids)
+            refresh_search_index(conn, artist_ids)
+            bump_data_versions(conn, {artist_scope(artist_id) for artist_id in artist_ids})
     
     def insert_tracks(self, tracks_data: List[Dict]) -> None:
-        """Insert track data to database"""
+        """Upsert track data, merging new attributes into known tracks"""
         if not tracks_data:
             return
+        
+        isrcs = {track.get('isrc') for track in tracks_data if track.get('isrc')}
+        with self.engine.begin() as conn:
+            previous_artist_ids = self.track_artist_ids(conn, isrcs)
+            self.stats['dimension_rows_upserted'] += self.upsert_dimension(
+                conn, 'dim_tracks', self.stamp_change_version(conn, tracks_data), ['isrc'])
             
-        df = pd.DataFrame(tracks_data)
-        df.to_sql('dim_tracks', self.engine, if_exists='append', index=False)
+            # Track -> artist links may be new, so re-derive the monthly rollups, counters and
+            # search documents of both the tracks' artists and any artists they moved away from
+            artist_ids = {track.get('artist_id') for track in tracks_data if track.get('artist_id')}
+            artist_ids |= previous_artist_ids
+            refresh_artist_rollups(conn, artist_ids)
+            refresh_counters(conn, artist_ids=artist_ids, isrcs=isrcs)
+            refresh_search_index(conn, artist_ids)
+            bump_data_versions(conn, {artist_scope(artist_id) for artist_id in artist_ids})
+    
+    def stamp_change_version(self, conn, records: List[Dict]) -> List[Dict]:
+        """Records tagged with the commit-ordered version of this transaction's bump"""
+        change_version = next_change_version(conn)
+        return [{**record, 'change_version': change_version} for record in records]
+    
+    def track_artist_ids(self, conn, isrcs) -> set:
+        """Artists that currently own any of the given tracks"""
+        if not isrcs:
+            return set()
+        
+        conn.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS tmp_track_lookup (isrc TEXT PRIMARY KEY)")
+        conn.exec_driver_sql("DELETE FROM tmp_track_lookup")
+        bulk_insert(conn, 'tmp_track_lookup', ['isrc'], [(isrc,) for isrc in isrcs])
+        return set(conn.execute(text("""
+            SELECT DISTINCT artist_id FROM dim_tracks
+            WHERE isrc IN (SELECT isrc FROM tmp_track_lookup) AND artist_id IS NOT NULL
+        """)).scalars())
+    
+    def upsert_dimension(self, conn, table: str, records: List[Dict], key_columns: List[str]) -> int:
+        """Set-based INSERT ... ON CONFLICT DO UPDATE of dimension records on the caller's transaction"""
+        if not records:
+            return 0
+        
+        df = pd.DataFrame(records)
+        columns = list(df.columns)
+        rows = self.dataframe_to_rows(df, columns)
+        return bulk_upsert(conn, table, columns, rows, key_columns, self.insert_batch_size)
     
     def insert_metrics(self, metrics_df: pd.DataFrame) -> None:
-        """Insert metrics data to database"""
+        """Bulk insert metrics data in one transaction using batched executemany"""
         if metrics_df.empty:
             return
+        
+        # Cleaned usage data names the country column 'country'
+        if 'country_code' not in metrics_df.columns and 'country' in metrics_df.columns:
+            metrics_df = metrics_df.rename(columns={'country': 'country_code'})
             
         # Ensure required columns
         required_cols = ['isrc', 'platform_id', 'metric_value', 'metric_type']
@@ -194,15 +649,53 @@ class MusicDataProcessor:
             if col not in metrics_df.columns:
                 metrics_df[col] = None
         
-        records_before = self.get_metrics_count()
-        metrics_df.to_sql('fact_music_metrics', self.engine, if_exists='append', index=False)
-        records_after = self.get_metrics_count()
+        # Only table columns are written; source columns from the raw file are dropped
+        columns = [col for col in FACT_METRIC_COLUMNS if col in metrics_df.columns]
+        rows = self.dataframe_to_rows(metrics_df, columns)
+        
+        started = time.perf_counter()
+        with self.engine.begin() as conn:
+            new_date_ids = self.ensure_dates(conn, metrics_df)
+            inserted = insert_facts(conn, columns, rows, self.insert_batch_size)
+            update_rollups_from_batch(conn, metrics_df)
+            bump_batch_versions(conn, metrics_df['platform_id'].dropna().unique().tolist(),
+                                f"SELECT isrc FROM {ROLLUP_STAGING_TABLE}")
+        
+        # Only remember calendar rows once the transaction that created them committed
+        self.known_date_ids.update(new_date_ids)
+        
+        self.stats['insert_seconds'] += time.perf_counter() - started
+        self.stats['records_inserted'] += inserted
+    
+    def ensure_dates(self, conn, metrics_df: pd.DataFrame) -> List[int]:
+        """Generate dim_dates rows for any date_id this run has not seen yet"""
+        if 'date_id' not in metrics_df.columns:
+            return []
+        
+        date_ids = set(metrics_df['date_id'].dropna().astype('int64').unique().tolist())
+        missing = date_ids - self.known_date_ids
+        return ensure_date_dimension(conn, missing) if missing else []
+    
+    def dataframe_to_rows(self, df: pd.DataFrame, columns: List[str]) -> List[tuple]:
+        """Convert frame columns to DB-API rows of native Python values (NaN -> None)"""
+        values = []
+        for col in columns:
+            series = df[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                series = series.dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+            series = series.astype(object)
+            values.append(series.where(series.notna(), None).tolist())
         
-        self.stats['records_inserted'] += (records_after - records_before)
+        return list(zip(*values))
+    
+    def log_insert_throughput(self, file_info: Dict, inserted: int, seconds: float) -> None:
+        """Print sustained fact insert throughput for one file"""
+        if inserted:
+            print(f"  ⚡ {file_info['name']}: loaded {inserted:,} rows in {seconds:.2f}s "
+                  f"({inserted / max(seconds, 1e-9):,.0f} rows/s)")
     
     def generate_artist_id(self, artist_name: str, platform: str) -> str:
         """Generate consistent artist ID"""
-        import hashlib
         if not artist_name:
             return None
         
@@ -228,22 +721,47 @@ class MusicDataProcessor:
         
         return df
     
-    def get_metrics_count(self) -> int:
-        """Get current metrics count"""
-        try:
-            with self.engine.connect() as conn:
-                from sqlalchemy import text
-                result = conn.execute(text("SELECT COUNT(*) FROM fact_music_metrics")).fetchone()
-                return result[0]
-        except:
-            return 0
-    
     def generate_processing_summary(self) -> Dict:
         """Generate processing summary"""
+        wall_clock = self.stats['wall_clock_seconds']
+        
+        workers = {}
+        for worker_id, worker in self.stats['workers'].items():
+            workers[worker_id] = {
+                **worker,
+                'rows_per_second': round(worker['rows'] / max(worker['busy_seconds'], 1e-9), 1)
+            }
+        busy_seconds = sum(worker['busy_seconds'] for worker in self.stats['workers'].values())
+        
         return {
             'files_processed': self.stats['files_processed'],
+            'files_skipped': self.stats['files_skipped'],
+            'records_read': self.stats['records_read'],
             'records_inserted': self.stats['records_inserted'],
+            'insert_rows_per_second': round(self.stats['records_inserted'] / self.stats['insert_seconds'], 1)
+                                      if self.stats['insert_seconds'] else 0.0,
             'errors': self.stats['errors'],
             'success_rate': (self.stats['files_processed'] - len(self.stats['errors'])) / max(1, self.stats['files_processed']),
+            'wall_clock_seconds': round(wall_clock, 3),
+            'workers': workers,
+            # Serial-equivalent parse time divided by elapsed time
+            'speedup': round(busy_seconds / wall_clock, 2) if workers and wall_clock else 1.0,
             'timestamp': datetime.now().isoformat()
-        }
\ No newline at end of file
+        }
+
+
+# Parallel ingestion workers. Each pool process builds its own processor once
+# and only parses/cleans; the parent process performs every database write.
+_worker_processor = None
+
+_worker_skip_checksums = set()
+
+def _init_ingest_worker(environment: str, skip_checksums: set) -> None:
+    """Create the per-process processor used by ingestion workers"""
+    global _worker_processor, _worker_skip_checksums
+    _worker_processor = MusicDataProcessor(environment)
+    _worker_skip_checksums = skip_checksums
+
+def _prepare_file_in_worker(file_path: str) -> Dict:
+    """Prepare one file inside a pool worker"""
+    return _worker_processor.prepare_file(file_path, _worker_skip_checksums)
\ No newline at end of file
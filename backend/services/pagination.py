@@ -0,0 +1,124 @@
+# backend/services/pagination.py
+import base64
+import json
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import pandas as pd
+from flask import Response, request, stream_with_context
+from sqlalchemy import text
+from services.response_encoding import encode_json
+from utils.config import Config
+
+class CursorError(ValueError):
+    """Raised for cursors that were not produced by the same query"""
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor holding the sort key of the last row on a page"""
+    return base64.urlsafe_b64encode(encode_json(list(values))).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, key_length: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise CursorError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != key_length:
+        raise CursorError('Invalid cursor')
+    return values
+
+class KeysetQuery:
+    """A SELECT that can be resumed after any row of its output.
+
+    order_by lists (output column, 'asc' | 'desc', SQL expression) and must
+    end in a unique key so the ordering is total. Each page filters on the
+    previous page's last key instead of using OFFSET, so deep pages cost the
+    same as the first and rows do not shift when new data lands between
+    requests. The filter is appended with keyset_clause: 'HAVING' for sql
+    ending in its GROUP BY, 'AND' for sql ending in a WHERE condition.
+    """
+
+    def __init__(self, sql: str, order_by: List[Tuple[str, str, str]], params: Optional[Dict[str, Any]] = None,
+                 keyset_clause: str = 'HAVING'):
+        self.sql = sql
+        self.order_by = order_by
+        self.params = params or {}
+        self.keyset_clause = keyset_clause
+
+    def statement(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        params = dict(self.params)
+        sql = self.sql
+        if cursor:
+            values = decode_cursor(cursor, len(self.order_by))
+            # (a, b) after (x, y): a beyond x, or a = x and b beyond y, ...
+            terms = []
+            for i, (_, direction, expression) in enumerate(self.order_by):
+                op = '<' if direction == 'desc' else '>'
+                equal = [f"{prior} = :cursor_{j}" for j, (_, _, prior) in enumerate(self.order_by[:i])]
+                terms.append('(' + ' AND '.join(equal + [f"{expression} {op} :cursor_{i}"]) + ')')
+                params[f"cursor_{i}"] = values[i]
+            # The redundant bound on the leading key lets SQLite seek an index on it
+            _, direction, leading = self.order_by[0]
+            sql += (f" {self.keyset_clause} {leading} {'<=' if direction == 'desc' else '>='} :cursor_0"
+                    f" AND ({' OR '.join(terms)})")
+
+        sql += ' ORDER BY ' + ', '.join(f"{expression} {direction.upper()}"
+                                        for _, direction, expression in self.order_by)
+        if limit is not None:
+            sql += ' LIMIT :page_limit'
+            params['page_limit'] = limit
+        return sql, params
+
+    def page(self, engine, cursor: Optional[str] = None,
+             limit: Optional[int] = 50) -> Tuple[pd.DataFrame, Optional[str]]:
+        """One page of rows and the cursor of the next page (None on the last page);
+        limit=None returns every row after the cursor"""
+        sql, params = self.statement(cursor, limit + 1 if limit is not None else None)
+        with engine.connect() as conn:
+            df = pd.read_sql(text(sql), conn, params=params)
+
+        if limit is None or len(df) <= limit:
+            return df, None
+        df = df.iloc[:limit]
+        last = df.iloc[-1]
+        return df, encode_cursor([last[column] for column, _, _ in self.order_by])
+
+    def stream(self, engine, cursor: Optional[str] = None,
+               batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield every row after the cursor as the database cursor produces them"""
+        # Built eagerly so a bad cursor fails before a streamed response starts
+        sql, params = self.statement(cursor)
+        return self._iter_rows(engine, sql, params, batch_size or Config.API_STREAM_BATCH_SIZE)
+
+    @staticmethod
+    def _iter_rows(engine, sql: str, params: Dict[str, Any], batch_size: int) -> Iterator[Dict[str, Any]]:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(text(sql), params)
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row._mapping)
+
+def page_args(default_limit: Optional[int] = 50) -> Tuple[Optional[str], Optional[int]]:
+    """(cursor, limit) from the query string, limit clamped to API_MAX_PAGE_SIZE.
+
+    With default_limit=None a request without limit or cursor is not paged
+    (limit None), so endpoints that used to return everything still do.
+    """
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit', type=int)
+    if limit is None:
+        if default_limit is None and cursor is None:
+            return None, None
+        limit = default_limit or Config.API_MAX_PAGE_SIZE
+    return cursor, max(1, min(limit, Config.API_MAX_PAGE_SIZE))
+
+def wants_ndjson() -> bool:
+    return request.args.get('format', '').lower() == 'ndjson'
+
+def ndjson_response(rows: Iterator[Dict[str, Any]]) -> Response:
+    """Stream rows as newline-delimited JSON without holding the result set in memory"""
+    def generate():
+        for row in rows:
+            yield encode_json(row) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
@@ -73,7 +73,11 @@ class ReportGenerator:
         }
     
     def get_artist_wrapped_data(self, artist_id, year):
-        """Collect comprehensive artist data for Wrapped report"""
+        """Collect comprehensive artist data for Wrapped report.
+        
+        Reads the daily rollup, which keeps every month even after raw facts
+        are archived out of fact_music_metrics.
+        """
         with self.engine.connect() as conn:
             from sqlalchemy import text
             
@@ -88,7 +92,7 @@ class ReportGenerator:
             # Total streams for the year
             total_streams = conn.execute(text("""
                 SELECT SUM(f.metric_value) as total_streams
-                FROM fact_music_metrics f
+                FROM agg_metrics_daily f
                 JOIN dim_tracks t ON f.isrc = t.isrc
                 JOIN dim_dates d ON f.date_id = d.date_id
                 WHERE t.artist_id = :artist_id
@@ -102,9 +106,9 @@ class ReportGenerator:
                     t.track_name,
                     t.album_name,
                     SUM(f.metric_value) as streams,
-                    COUNT(DISTINCT f.country_code) as countries,
+                    COUNT(DISTINCT NULLIF(f.country_code, '')) as countries,
                     COUNT(DISTINCT f.platform_id) as platforms
-                FROM fact_music_metrics f
+                FROM agg_metrics_daily f
                 JOIN dim_tracks t ON f.isrc = t.isrc
                 JOIN dim_dates d ON f.date_id = d.date_id
                 WHERE t.artist_id = ? AND d.year = ?
@@ -120,7 +124,7 @@ class ReportGenerator:
                     d.month,
                     d.month_name,
                     SUM(f.metric_value) as streams
-                FROM fact_music_metrics f
+                FROM agg_metrics_daily f
                 JOIN dim_tracks t ON f.isrc = t.isrc
                 JOIN dim_dates d ON f.date_id = d.date_id
                 WHERE t.artist_id = ? AND d.year = ?
@@ -135,7 +139,7 @@ class ReportGenerator:
                     p.platform_name,
                     SUM(f.metric_value) as streams,
                     ROUND(100.0 * SUM(f.metric_value) / ?, 1) as percentage
-                FROM fact_music_metrics f
+                FROM agg_metrics_daily f
                 JOIN dim_platforms p ON f.platform_id = p.platform_id
                 JOIN dim_tracks t ON f.isrc = t.isrc
                 JOIN dim_dates d ON f.date_id = d.date_id
@@ -151,13 +155,13 @@ class ReportGenerator:
                     COALESCE(c.country_name, f.country_code) as country,
                     SUM(f.metric_value) as streams,
                     ROUND(100.0 * SUM(f.metric_value) / ?, 1) as percentage
-                FROM fact_music_metrics f
+                FROM agg_metrics_daily f
                 LEFT JOIN dim_countries c ON f.country_code = c.country_code
                 JOIN dim_tracks t ON f.isrc = t.isrc
                 JOIN dim_dates d ON f.date_id = d.date_id
                 WHERE t.artist_id = ? AND d.year = ?
                 AND f.metric_type = 'streams'
-                AND f.country_code IS NOT NULL
+                AND f.country_code != ''
                 GROUP BY f.country_code, c.country_name
                 ORDER BY streams DESC
                 LIMIT 10
@@ -221,7 +225,7 @@ class ReportGenerator:
             
             total_streams = conn.execute(text("""
                 SELECT SUM(f.metric_value) as streams
-                FROM fact_music_metrics f
+                FROM agg_metrics_daily f
                 JOIN dim_tracks t ON f.isrc = t.isrc
                 JOIN dim_dates d ON f.date_id = d.date_id
                 WHERE t.artist_id = :artist_id
@@ -0,0 +1,89 @@
+# backend/services/response_encoding.py
+import gzip
+import json
+from typing import Any, Optional
+import numpy as np
+import pandas as pd
+from flask import Response, request
+from utils.config import Config
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+def frame_records_json(df: pd.DataFrame) -> bytes:
+    """Encode a frame as a JSON array of records straight from its columns.
+
+    Uses pandas' C encoder instead of to_dict('records') + json.dumps, and
+    writes NaN as null (the stdlib encoder would emit invalid NaN literals).
+    """
+    return df.to_json(orient='records', date_format='iso', double_precision=15).encode('utf-8')
+
+def _default(value: Any):
+    """json.dumps fallback for numpy / pandas scalars and dates"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def encode_json(value: Any) -> bytes:
+    """Encode a value as JSON bytes; DataFrames anywhere at the top level use the fast path"""
+    if isinstance(value, pd.DataFrame):
+        return frame_records_json(value)
+    return json.dumps(value, default=_default, separators=(',', ':')).encode('utf-8')
+
+def json_response(status: int = 200, **fields) -> Response:
+    """Build a JSON object response whose DataFrame fields are encoded without dict materialization"""
+    body = b'{' + b','.join(
+        json.dumps(name).encode('utf-8') + b':' + encode_json(value) for name, value in fields.items()
+    ) + b'}'
+    return Response(body, status=status, mimetype='application/json')
+
+def negotiate_encoding() -> Optional[str]:
+    """Best content coding the client accepts: br (when installed), then gzip"""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=Config.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=Config.COMPRESSION_LEVEL)
+
+def should_compress(response: Response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and 'Content-Encoding' not in response.headers
+        and (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)
+        and (response.calculate_content_length() or 0) >= Config.COMPRESSION_MIN_BYTES
+    )
+
+def apply_encoding(response: Response, body: bytes, encoding: str) -> Response:
+    """Swap in an already compressed body and mark the response accordingly"""
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag:
+        # Each coding is a distinct representation, so it needs its own strong validator
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
+
+def init_compression(app) -> None:
+    """Compress eligible responses that views did not already encode"""
+    @app.after_request
+    def compress_response(response):
+        if not should_compress(response):
+            return response
+
+        encoding = negotiate_encoding()
+        if encoding:
+            apply_encoding(response, compress_body(response.get_data(), encoding), encoding)
+        else:
+            response.vary.add('Accept-Encoding')
+        return response
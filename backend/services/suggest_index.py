@@ -0,0 +1,282 @@
+# backend/services/suggest_index.py
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import text
+from models.database import get_db_engine
+from models.data_versions import GLOBAL_SCOPE
+from utils.config import Config
+
+# Only the first few word starts of a name are indexed ("swift" finds
+# "Taylor Swift"), which bounds keys per name for long track titles.
+MAX_WORD_STARTS = 4
+
+# Above this many matching keys a popularity-ordered scan finds the top
+# completions faster than ranking every match; its results are memoized
+# per snapshot because wide prefixes are also the most frequently typed
+RANKED_SCAN_THRESHOLD = 2000
+MEMO_MAX_ENTRIES = 4096
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+class Suggestion(NamedTuple):
+    kind: str  # 'artist' | 'track'
+    id: str
+    name: str
+    artist_name: Optional[str]
+    popularity: float
+
+def normalize_name(name) -> str:
+    """Case- and accent-folded name with punctuation collapsed to single spaces"""
+    name = str(name or '')
+    if not name.isascii():
+        decomposed = unicodedata.normalize('NFKD', name)
+        name = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', name.casefold()).replace('_', ' ').strip()
+
+def name_keys(name) -> Tuple[str, ...]:
+    """Normalized name suffixes starting at each of the first MAX_WORD_STARTS words"""
+    words = normalize_name(name).split()
+    return tuple(' '.join(words[i:]) for i in range(min(len(words), MAX_WORD_STARTS)))
+
+def _rank(suggestion: Suggestion):
+    return (-suggestion.popularity, suggestion.kind, suggestion.id)
+
+class PrefixIndex:
+    """In-process autocomplete over artist and track names, ranked by streams.
+
+    Names live in one sorted list of "<name suffix>\\0<kind>\\0<id>" keys with
+    an aligned list of owning documents, so a prefix lookup is two bisections
+    and a slice. Narrow prefixes rank their matches directly; wide ones (a
+    single letter) walk a popularity-ordered list until enough documents
+    match. Readers use an immutable snapshot that refreshes swap atomically,
+    so lookups never take a lock.
+
+    Footprint: about 750 bytes per indexed name (roughly 750 MB per million
+    artist + track names) for the keys, documents and rank list together,
+    measured with tracemalloc on names of one to four words.
+    """
+
+    def __init__(self, engine=None, poll_seconds: float = 5.0):
+        self._engine = engine
+        self.poll_seconds = poll_seconds
+        # keys, key owners, documents, name keys per document, rank tuples, wide-prefix memo
+        self._snapshot = ([], [], {}, {}, [], {})
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        # Global data version loaded so far; it follows commit order, so it is
+        # also the watermark for incremental refreshes (see models/data_versions.py)
+        self._seen_version = None
+        self._checked_at = 0.0
+        self.built_at = None
+        self.last_refresh = None
+
+    @property
+    def engine(self):
+        return self._engine or get_db_engine()
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """Top `limit` artists and tracks whose name (or a later word of it) starts with prefix"""
+        needle = normalize_name(prefix)
+        if not needle or limit <= 0:
+            return []
+
+        keys, owners, documents, document_keys, ranked, memo = self._snapshot
+        lo = bisect.bisect_left(keys, needle)
+        hi = bisect.bisect_left(keys, needle + '\U0010ffff', lo)
+
+        if hi - lo <= RANKED_SCAN_THRESHOLD:
+            return heapq.nsmallest(limit, (documents[doc] for doc in set(owners[lo:hi])), key=_rank)
+
+        results = memo.get((needle, limit))
+        if results is None:
+            results = []
+            for _, kind, doc_id in ranked:
+                if any(key.startswith(needle) for key in document_keys[(kind, doc_id)]):
+                    results.append(documents[(kind, doc_id)])
+                    if len(results) == limit:
+                        break
+            if len(memo) >= MEMO_MAX_ENTRIES:
+                memo.clear()
+            memo[(needle, limit)] = results
+        return list(results)
+
+    def __len__(self) -> int:
+        return len(self._snapshot[2])
+
+    def stats(self) -> Dict:
+        keys, _, documents, _, _, _ = self._snapshot
+        return {
+            'documents': len(documents),
+            'keys': len(keys),
+            'built_at': self.built_at,
+            'last_refresh': self.last_refresh
+        }
+
+    def rebuild(self) -> int:
+        """Load every artist and track name; returns the number of documents"""
+        with self.engine.connect() as conn:
+            # Read before loading: rows committed in between are simply re-read next time
+            version = self._global_version(conn)
+            suggestions = self._load(conn)
+
+        with self._lock:
+            self._install(suggestions, replace_all=True)
+            self._seen_version = version
+            self.built_at = self.last_refresh = time.time()
+        return len(suggestions)
+
+    def refresh(self) -> int:
+        """Reload names and popularity of artists and tracks changed since the last load.
+
+        A change is a dim_artists / dim_tracks upsert or new metrics for an
+        artist (its data version scope was bumped); tracks follow their artist.
+        Changes are found by change_version, which a transaction still open
+        during the last refresh stamps above that refresh's watermark, so late
+        commits are never skipped. Returns the number of documents reloaded.
+        """
+        if self._seen_version is None:
+            return self.rebuild()
+
+        with self.engine.connect() as conn:
+            version = self._global_version(conn)
+            suggestions = self._load(conn, since_version=self._seen_version)
+
+        with self._lock:
+            self._install(suggestions, replace_all=False)
+            self._seen_version = version
+            self.last_refresh = time.time()
+        return len(suggestions)
+
+    def ensure_fresh(self) -> None:
+        """Build on first use; afterwards refresh in the background when the data version moves"""
+        if self.built_at is None:
+            with self._refreshing:
+                if self.built_at is None:
+                    self.rebuild()
+            return
+
+        now = time.monotonic()
+        if now - self._checked_at < self.poll_seconds:
+            return
+        self._checked_at = now
+
+        try:
+            with self.engine.connect() as conn:
+                version = self._global_version(conn)
+        except Exception:
+            return
+        if version != self._seen_version and self._refreshing.acquire(blocking=False):
+            threading.Thread(target=self._refresh_locked, name='suggest-refresh', daemon=True).start()
+
+    def start(self) -> None:
+        """Build on a daemon thread so the first request does not pay for it"""
+        if self.built_at is None and self._refreshing.acquire(blocking=False):
+            threading.Thread(target=self._refresh_locked, name='suggest-build', daemon=True).start()
+
+    def _refresh_locked(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"⚠️ Suggest index refresh failed: {e}")
+        finally:
+            self._refreshing.release()
+
+    @staticmethod
+    def _global_version(conn) -> int:
+        return conn.execute(text(
+            "SELECT version FROM data_versions WHERE scope = :scope"
+        ), {'scope': GLOBAL_SCOPE}).scalar() or 0
+
+    @staticmethod
+    def _load(conn, since_version: Optional[int] = None) -> List[Suggestion]:
+        params = {}
+        artist_filter = track_filter = ''
+        if since_version is not None:
+            params['since'] = since_version
+            changed_artists = """
+                SELECT artist_id FROM dim_artists WHERE change_version > :since
+                UNION
+                SELECT substr(scope, 8) FROM data_versions
+                WHERE scope LIKE 'artist:%' AND change_version > :since
+            """
+            artist_filter = f"WHERE a.artist_id IN ({changed_artists})"
+            track_filter = f"AND (t.change_version > :since OR t.artist_id IN ({changed_artists}))"
+
+        artists = conn.execute(text(f"""
+            SELECT a.artist_id, a.artist_name, COALESCE(a.total_streams, 0)
+            FROM dim_artists a
+            {artist_filter}
+        """), params).fetchall()
+
+        tracks = conn.execute(text(f"""
+            SELECT t.isrc, t.track_name, a.artist_name, COALESCE(t.total_streams, 0)
+            FROM dim_tracks t
+            LEFT JOIN dim_artists a ON a.artist_id = t.artist_id
+            WHERE t.track_name IS NOT NULL {track_filter}
+        """), params).fetchall()
+
+        return ([Suggestion('artist', artist_id, name, None, float(popularity))
+                 for artist_id, name, popularity in artists if name]
+                + [Suggestion('track', isrc, name, artist_name, float(popularity))
+                   for isrc, name, artist_name, popularity in tracks])
+
+    def _install(self, suggestions: List[Suggestion], replace_all: bool) -> None:
+        """Swap in a snapshot with the given documents added or replaced (caller holds _lock)"""
+        old_keys, old_owners, old_documents, old_document_keys, old_ranked, _ = self._snapshot
+        changed = {(suggestion.kind, suggestion.id): suggestion for suggestion in suggestions}
+        documents = {} if replace_all else dict(old_documents)
+        document_keys = {} if replace_all else dict(old_document_keys)
+        removed_keys, removed_ranks = [], []
+        for doc, suggestion in changed.items():
+            if doc in documents:
+                removed_keys.extend(f"{key}\x00{doc[0]}\x00{doc[1]}" for key in document_keys[doc])
+                removed_ranks.append(_rank(documents[doc]))
+            documents[doc] = suggestion
+            document_keys[doc] = name_keys(suggestion.name)
+
+        entries = [(f"{key}\x00{doc[0]}\x00{doc[1]}", doc) for doc in changed for key in document_keys[doc]]
+        ranks = [(_rank(suggestion), None) for suggestion in changed.values()]
+        if replace_all:
+            entries.sort()
+            keys, owners = [key for key, _ in entries], [doc for _, doc in entries]
+            ranked = sorted(rank for rank, _ in ranks)
+        else:
+            keys, owners = _splice(old_keys, old_owners, removed_keys, entries)
+            ranked, _ = _splice(old_ranked, None, removed_ranks, ranks)
+
+        self._snapshot = (keys, owners, documents, document_keys, ranked, {})
+
+def _splice(items: List, owners: Optional[List], removed: List, added: List[Tuple]) -> Tuple[List, Optional[List]]:
+    """Copy sorted items (and their aligned owners) without `removed` and with the
+    (item, owner) pairs of `added` merged in, using slice copies between edits.
+
+    Linear in memcpy rather than Python steps, so refreshing a few thousand
+    documents in an index of millions of keys takes milliseconds.
+    """
+    edits = sorted([(bisect.bisect_left(items, item), 0, item, None) for item in removed]
+                   + [(bisect.bisect_left(items, item), 1, item, owner) for item, owner in added])
+    new_items, new_owners, start = [], [] if owners is not None else None, 0
+    for position, is_addition, item, owner in edits:
+        if position > start:
+            new_items.extend(items[start:position])
+            if owners is not None:
+                new_owners.extend(owners[start:position])
+            start = position
+        if is_addition:
+            new_items.append(item)
+            if owners is not None:
+                new_owners.append(owner)
+        elif position < len(items) and items[position] == item:
+            start = position + 1
+
+    new_items.extend(items[start:])
+    if owners is not None:
+        new_owners.extend(owners[start:])
+    return new_items, new_owners
+
+suggest_index = PrefixIndex(poll_seconds=Config.SUGGEST_POLL_SECONDS)
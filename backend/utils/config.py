@@ -14,10 +14,57 @@ class Config:
     # Database Configuration
     DATABASE_URL: str = os.environ.get('DATABASE_URL', 'sqlite:///data/music_analytics.db')
     DATABASE_POOL_SIZE: int = int(os.environ.get('DATABASE_POOL_SIZE', '10'))
+    DATABASE_MAX_OVERFLOW: int = int(os.environ.get('DATABASE_MAX_OVERFLOW', '20'))
+    DATABASE_POOL_TIMEOUT: int = int(os.environ.get('DATABASE_POOL_TIMEOUT', '30'))
+    DATABASE_POOL_RECYCLE: int = int(os.environ.get('DATABASE_POOL_RECYCLE', '3600'))
     
-    # Cache Configuration
+    # SQLite connection profile (applied on every new connection)
+    SQLITE_TUNING: bool = os.environ.get('SQLITE_TUNING', 'true').lower() == 'true'
+    SQLITE_JOURNAL_MODE: str = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS: str = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE_MB: int = int(os.environ.get('SQLITE_MMAP_SIZE_MB', '256'))
+    SQLITE_CACHE_SIZE_MB: int = int(os.environ.get('SQLITE_CACHE_SIZE_MB', '64'))
+    SQLITE_TEMP_STORE: str = os.environ.get('SQLITE_TEMP_STORE', 'MEMORY')
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    
+    # Cache Configuration (CACHE_TYPE: simple | filesystem | redis)
     CACHE_TYPE: str = os.environ.get('CACHE_TYPE', 'simple')
     CACHE_DEFAULT_TIMEOUT: int = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', '300'))
+    CACHE_MAX_ENTRIES: int = int(os.environ.get('CACHE_MAX_ENTRIES', '1024'))
+    CACHE_MAX_SIZE_MB: int = int(os.environ.get('CACHE_MAX_SIZE_MB', '64'))
+    CACHE_STALE_WHILE_REVALIDATE: int = int(os.environ.get('CACHE_STALE_WHILE_REVALIDATE', '300'))
+    CACHE_VERSION_POLL_SECONDS: float = float(os.environ.get('CACHE_VERSION_POLL_SECONDS', '1.0'))
+    CACHE_WARM_ON_STARTUP: bool = os.environ.get('CACHE_WARM_ON_STARTUP', 'true').lower() == 'true'
+    CACHE_WARM_BUDGET_SECONDS: float = float(os.environ.get('CACHE_WARM_BUDGET_SECONDS', '30'))
+    CACHE_WARM_TOP_ARTISTS: int = int(os.environ.get('CACHE_WARM_TOP_ARTISTS', '20'))
+    CACHE_WARM_POLL_SECONDS: float = float(os.environ.get('CACHE_WARM_POLL_SECONDS', '5'))
+    CACHE_DIR: str = os.environ.get('CACHE_DIR', 'data/cache')
+    CACHE_REDIS_URL: str = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Response compression (brotli is used when the optional package is installed)
+    COMPRESSION_MIN_BYTES: int = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+    COMPRESSION_LEVEL: int = int(os.environ.get('COMPRESSION_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+    
+    # Keyset pagination and NDJSON streaming of large result sets
+    API_MAX_PAGE_SIZE: int = int(os.environ.get('API_MAX_PAGE_SIZE', '1000'))
+    API_STREAM_BATCH_SIZE: int = int(os.environ.get('API_STREAM_BATCH_SIZE', '1000'))
+    
+    # Search-as-you-type prefix index (built in memory by each API process)
+    SUGGEST_BUILD_ON_STARTUP: bool = os.environ.get('SUGGEST_BUILD_ON_STARTUP', 'true').lower() == 'true'
+    SUGGEST_POLL_SECONDS: float = float(os.environ.get('SUGGEST_POLL_SECONDS', '5'))
+    
+    # Engine for wide aggregations: sqlite | duckdb (needs the optional duckdb package)
+    ANALYTICS_ENGINE: str = os.environ.get('ANALYTICS_ENGINE', 'sqlite')
+    
+    # Parquet archive of closed fact months (ARCHIVE_HOT_MONTHS includes the current month)
+    ARCHIVE_DIR: str = os.environ.get('ARCHIVE_DIR', 'data/archive')
+    ARCHIVE_HOT_MONTHS: int = int(os.environ.get('ARCHIVE_HOT_MONTHS', '3'))
+    ARCHIVE_PRUNE: bool = os.environ.get('ARCHIVE_PRUNE', 'false').lower() == 'true'
+    ARCHIVE_CHUNK_ROWS: int = int(os.environ.get('ARCHIVE_CHUNK_ROWS', '500000'))
+    
+    # Fact dates before this year (or after next year) share one overflow partition
+    FACT_PARTITION_MIN_YEAR: int = int(os.environ.get('FACT_PARTITION_MIN_YEAR', '2000'))
     
     # Email Configuration
     SMTP_SERVER: str = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
@@ -30,6 +77,9 @@ class Config:
     # File Processing Configuration
     MAX_FILE_SIZE_MB: int = int(os.environ.get('MAX_FILE_SIZE_MB', '100'))
     UPLOAD_FOLDER: str = os.environ.get('UPLOAD_FOLDER', 'data/raw')
+    INGEST_CHUNK_SIZE: int = int(os.environ.get('INGEST_CHUNK_SIZE', '100000'))
+    INGEST_INSERT_BATCH_SIZE: int = int(os.environ.get('INGEST_INSERT_BATCH_SIZE', '50000'))
+    INGEST_WORKERS: int = int(os.environ.get('INGEST_WORKERS', str(os.cpu_count() or 2)))
     
     # Report Configuration
     REPORTS_FOLDER: str = os.environ.get('REPORTS_FOLDER', 'reports/generated')
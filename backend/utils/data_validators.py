@@ -265,6 +265,36 @@ class DataValidator:
         
         return parsed_dates
     
+    def derive_date_ids(self, df: pd.DataFrame, report_period: Optional[str] = None) -> pd.Series:
+        """Derive YYYYMMDD date ids from the row dates, falling back to the report period.
+        
+        report_period is the YYYYMM extracted from the file path; rows without a
+        parseable date of their own are attributed to the first day of that month.
+        """
+        date_ids = pd.Series(pd.NA, index=df.index, dtype='Int64')
+        
+        date_col = self.find_column_by_mapping(df, 'date')
+        if date_col:
+            # Report files repeat a handful of dates, so parse each distinct value once
+            raw = df[date_col].astype(str).str.strip()
+            distinct = raw.drop_duplicates()
+            parsed = self.validate_date_values(distinct)
+            parsed = parsed.where(parsed.dt.year.between(1900, 2100))
+            lookup = pd.Series(
+                (parsed.dt.year * 10000 + parsed.dt.month * 100 + parsed.dt.day).astype('Int64').values,
+                index=distinct.values
+            )
+            date_ids = raw.map(lookup).astype('Int64')
+        
+        if report_period and date_ids.isna().any():
+            try:
+                fallback = int(datetime.strptime(report_period, '%Y%m').strftime('%Y%m%d'))
+                date_ids = date_ids.fillna(fallback)
+            except ValueError:
+                pass
+        
+        return date_ids
+    
     def clean_metadata(self, df: pd.DataFrame) -> pd.DataFrame:
         """Clean metadata file comprehensively"""
         if df is None or df.empty:
@@ -298,7 +328,8 @@ class DataValidator:
         
         return df_clean
     
-    def clean_usage_data(self, df: pd.DataFrame, platform_id: str) -> pd.DataFrame:
+    def clean_usage_data(self, df: pd.DataFrame, platform_id: str,
+                         report_period: Optional[str] = None) -> pd.DataFrame:
         """Clean usage/metrics data"""
         if df is None or df.empty:
             return df
@@ -323,6 +354,9 @@ class DataValidator:
         # Determine metric type based on platform
         df_clean['metric_type'] = self.determine_metric_type(platform_id, df_clean.columns)
         
+        # Resolve the reporting date to a dim_dates key
+        df_clean['date_id'] = self.derive_date_ids(df_clean, report_period)
+        
         # Remove rows with invalid core data
         if 'metric_value' in df_clean.columns:
             df_clean = df_clean.dropna(subset=['metric_value'])
@@ -330,7 +364,7 @@ class DataValidator:
         
         return df_clean
     
-    def clean_apple_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def clean_apple_data(self, df: pd.DataFrame, report_period: Optional[str] = None) -> pd.DataFrame:
         """Clean Apple Music specific data"""
         if df is None or df.empty:
             return df
@@ -357,6 +391,7 @@ class DataValidator:
         # Set platform-specific values
         df_clean['platform_id'] = 'apl-apple-music'
         df_clean['metric_type'] = 'streams'
+        df_clean['date_id'] = self.derive_date_ids(df_clean, report_period)
         
         return df_clean
     
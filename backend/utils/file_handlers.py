@@ -2,11 +2,15 @@
 import pandas as pd
 import os
 import re
-from typing import Dict, List, Optional, Union
+import csv
+import codecs
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Union
 import chardet
 from pathlib import Path
 import hashlib
 from datetime import datetime
+from utils.data_validators import DataValidator
 
 class FileHandler:
     """Comprehensive file handling utilities for music data processing"""
@@ -14,6 +18,11 @@ class FileHandler:
     def __init__(self):
         self.supported_extensions = ['.csv', '.txt', '.tsv', '.xlsx', '.xls']
         self.encoding_priority = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252', 'utf-16']
+        self.separators = [',', '\t', ';', '|', '~']
+        self.na_values = ['', 'NULL', 'null', 'N/A', 'n/a', '#N/A']
+        self.sniff_sample_bytes = 65536
+        self.header_aliases = {alias.lower() for aliases in DataValidator().column_mappings.values()
+                               for alias in aliases}
         
     def discover_files(self, folder_path: str) -> List[str]:
         """Discover all supported data files in folder and subfolders"""
@@ -44,24 +53,28 @@ class FileHandler:
             'platform': self.detect_platform_from_path(file_path),
             'type': None,
             'date_folder': self.extract_date_from_path(file_path),
-            'encoding': None
+            'encoding': None,
+            'format': None
         }
         
-        # Detect encoding for text files
+        # Sniff encoding, delimiter and header row once for text files
         if file_info['extension'] in ['.csv', '.txt', '.tsv']:
-            file_info['encoding'] = self.detect_encoding(file_path)
+            file_info['format'] = self.sniff_format(file_path)
+            file_info['encoding'] = file_info['format']['encoding']
         
         return file_info
     
-    def read_file(self, file_path: str) -> Optional[pd.DataFrame]:
-        """Read file with automatic format detection and encoding handling"""
+    def read_file(self, file_path: str, file_info: Optional[Dict] = None) -> Optional[pd.DataFrame]:
+        """Read file with automatic format detection and encoding handling.
+        A file_info from analyze_file lets text reads reuse its sniffed format."""
         try:
             file_ext = os.path.splitext(file_path)[1].lower()
             
             if file_ext in ['.xlsx', '.xls']:
                 return self.read_excel_file(file_path)
             else:
-                return self.read_text_file(file_path)
+                file_format = file_info.get('format') if file_info else None
+                return self.read_text_file(file_path, file_format)
                 
         except Exception as e:
             print(f"❌ Error reading file {file_path}: {e}")
@@ -91,21 +104,28 @@ class FileHandler:
             print(f"❌ Excel read error: {e}")
             return None
     
-    def read_text_file(self, file_path: str) -> Optional[pd.DataFrame]:
-        """Read text files (CSV, TSV, etc.) with encoding detection"""
-        encoding = self.detect_encoding(file_path)
+    def read_text_file(self, file_path: str, file_format: Optional[Dict] = None) -> Optional[pd.DataFrame]:
+        """Read text files (CSV, TSV, etc.) in a single parse using the sniffed format"""
+        if file_format is None:
+            file_format = self.sniff_format(file_path)
         
-        # Try different separators
-        separators = [',', '\t', ';', '|', '~']
+        try:
+            df = pd.read_csv(file_path, low_memory=False, **self.read_csv_options(file_format))
+            return self.clean_dataframe(df)
+        except Exception as e:
+            print(f"  ⚠️ Sniffed format failed ({e}), retrying with separator trials")
+        
+        encoding = file_format['encoding']
         
-        for sep in separators:
+        # Try different separators
+        for sep in self.separators:
             try:
                 df = pd.read_csv(
                     file_path,
                     sep=sep,
                     encoding=encoding,
                     low_memory=False,
-                    na_values=['', 'NULL', 'null', 'N/A', 'n/a', '#N/A'],
+                    na_values=self.na_values,
                     keep_default_na=True
                 )
                 
@@ -124,8 +144,149 @@ class FileHandler:
             print(f"❌ Text file read error: {e}")
             return None
     
-    def clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Clean and standardize dataframe"""
+    def read_file_chunks(self, file_path: str, chunk_size: int = 100000,
+                         file_info: Optional[Dict] = None) -> Iterator[pd.DataFrame]:
+        """Read file in bounded row chunks so memory stays flat for large exports"""
+        file_ext = os.path.splitext(file_path)[1].lower()
+        
+        if file_ext in ['.xlsx', '.xls']:
+            # Excel workbooks cannot be streamed by pandas, so slice the frame instead
+            df = self.read_excel_file(file_path)
+            if df is None or df.empty:
+                return
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size].copy()
+            return
+        
+        file_format = file_info.get('format') if file_info else None
+        if file_format is None:
+            file_format = self.sniff_format(file_path)
+        
+        reader = pd.read_csv(file_path, chunksize=chunk_size, **self.read_csv_options(file_format))
+        
+        # The column set comes from the header so every chunk of a file reaches the
+        # handlers with the same schema; only empty rows are dropped per chunk
+        with reader:
+            for chunk in reader:
+                chunk = self.clean_dataframe(chunk, drop_empty_columns=False)
+                if chunk is not None and not chunk.empty:
+                    yield chunk
+    
+    def read_csv_options(self, file_format: Dict) -> Dict:
+        """Translate a sniffed format into pandas.read_csv keyword arguments"""
+        return {
+            'sep': file_format['delimiter'],
+            'quotechar': file_format['quotechar'],
+            'encoding': file_format['encoding'],
+            'skiprows': file_format['header_row'],
+            'header': 0,
+            # Trailing delimiters must not turn the first column into the index
+            'index_col': False,
+            'na_values': self.na_values,
+            'keep_default_na': True
+        }
+    
+    def sniff_format(self, file_path: str) -> Dict:
+        """Work out encoding, delimiter and header row from one small byte
+        sample instead of trial-parsing the whole file"""
+        with open(file_path, 'rb') as file:
+            raw_data = file.read(self.sniff_sample_bytes)
+        
+        encoding = self.detect_encoding_from_bytes(raw_data)
+        
+        # Decode incrementally so a multi-byte character cut at the sample edge is ignored
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        sample = decoder.decode(raw_data, final=False)
+        lines = sample.splitlines()
+        if len(raw_data) == self.sniff_sample_bytes and len(lines) > 1:
+            lines = lines[:-1]  # Last line is probably truncated
+        sample = '\n'.join(lines)
+        
+        # Only the delimiter is sniffed: apostrophes in titles ('Til I Collapse)
+        # make the sniffer guess ' as the quote character and silently merge rows
+        quotechar = '"'
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=''.join(self.separators)).delimiter
+        except csv.Error:
+            delimiter = self.detect_delimiter_by_consistency(lines)
+        
+        return {
+            'encoding': encoding,
+            'delimiter': delimiter,
+            'quotechar': quotechar,
+            'header_row': self.detect_header_row(lines, delimiter, quotechar)
+        }
+    
+    def detect_delimiter_by_consistency(self, lines: List[str]) -> str:
+        """Pick the separator that splits most sample lines into the same number of fields"""
+        best_sep, best_score = ',', 0
+        
+        for sep in self.separators:
+            counts = [line.count(sep) for line in lines if line.strip()]
+            if not counts:
+                continue
+            modal_count, frequency = Counter(counts).most_common(1)[0]
+            score = frequency if modal_count > 0 else 0
+            if score > best_score:
+                best_sep, best_score = sep, score
+        
+        return best_sep
+    
+    def detect_header_row(self, lines: List[str], delimiter: str, quotechar: str = '"') -> int:
+        """Find the header line, skipping report preambles.
+        
+        Only leading lines narrower than the modal row width (or unparseable)
+        count as preamble, so a header with more or fewer columns than trailing
+        delimiters give the data rows is kept. Nothing is skipped unless the
+        line after the preamble looks like a header.
+        """
+        field_counts = self.count_fields(lines, delimiter, quotechar)
+        counts = [count for line, count in zip(lines, field_counts) if line.strip() and count]
+        if not counts:
+            return 0
+        
+        modal_count = Counter(counts).most_common(1)[0][0]
+        for index, (line, count) in enumerate(zip(lines, field_counts)):
+            if not line.strip() or count < modal_count:
+                continue
+            if index == 0:
+                return 0
+            fields = next(csv.reader([line], delimiter=delimiter, quotechar=quotechar))
+            return index if self.looks_like_header(fields) else 0
+        
+        return 0
+    
+    def count_fields(self, lines: List[str], delimiter: str, quotechar: str) -> List[int]:
+        """Fields per line; 0 for lines that do not parse"""
+        try:
+            return [len(fields) for fields in csv.reader(lines, delimiter=delimiter, quotechar=quotechar)]
+        except csv.Error:
+            pass
+        
+        counts = []
+        for line in lines:
+            try:
+                counts.append(len(next(csv.reader([line], delimiter=delimiter, quotechar=quotechar), [])))
+            except csv.Error:
+                counts.append(0)
+        return counts
+    
+    def looks_like_header(self, fields: List[str]) -> bool:
+        """No numeric fields and at least one known column name"""
+        names = [field.strip().lower() for field in fields if field.strip()]
+        if not names:
+            return False
+        for name in names:
+            try:
+                float(name.replace(',', ''))
+                return False
+            except ValueError:
+                pass
+        return any(name in self.header_aliases for name in names)
+    
+    def clean_dataframe(self, df: pd.DataFrame, drop_empty_columns: bool = True) -> pd.DataFrame:
+        """Clean and standardize dataframe. Chunked reads keep empty columns,
+        since a column empty in one chunk may be filled in the next."""
         if df is None or df.empty:
             return df
         
@@ -134,7 +295,8 @@ class FileHandler:
         
         # Remove completely empty rows and columns  
         df = df.dropna(how='all')
-        df = df.loc[:, df.notna().any()]
+        if drop_empty_columns:
+            df = df.loc[:, df.notna().any()]
         
         # Strip whitespace from string columns
         string_columns = df.select_dtypes(include=['object']).columns
@@ -150,20 +312,27 @@ class FileHandler:
         try:
             with open(file_path, 'rb') as file:
                 raw_data = file.read(10000)  # Read first 10KB
-                result = chardet.detect(raw_data)
-                detected_encoding = result['encoding']
-                
-                # Validate detected encoding
-                if detected_encoding and result['confidence'] > 0.7:
-                    return detected_encoding
+        except:
+            return 'utf-8'
+        
+        return self.detect_encoding_from_bytes(raw_data)
+    
+    def detect_encoding_from_bytes(self, raw_data: bytes) -> str:
+        """Detect encoding from an already-read byte sample"""
+        try:
+            result = chardet.detect(raw_data[:10000])
+            detected_encoding = result['encoding']
+            
+            # Validate detected encoding
+            if detected_encoding and result['confidence'] > 0.7:
+                return detected_encoding
         except:
             pass
         
         # Fallback to trying common encodings
         for encoding in self.encoding_priority:
             try:
-                with open(file_path, 'r', encoding=encoding) as file:
-                    file.read(1000)  # Try to read first 1000 chars
+                codecs.getincrementaldecoder(encoding)().decode(raw_data[:4000], final=False)
                 return encoding
             except:
                 continue
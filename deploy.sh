@@ -315,8 +315,22 @@ case "${1:-}" in
         backup_dir="backups/backup_${timestamp}"
         mkdir -p "$backup_dir"
         
-        # Backup database
-        cp data/music_analytics.db "$backup_dir/" 2>/dev/null || true
+        # Backup database through SQLite's online backup so the copy is one consistent
+        # snapshot including commits still in the WAL (copying the files can tear)
+        if [ -f data/music_analytics.db ]; then
+            if command -v sqlite3 &> /dev/null; then
+                sqlite3 data/music_analytics.db ".backup '$backup_dir/music_analytics.db'"
+            else
+                python3 -c "import sqlite3, sys; sqlite3.connect(sys.argv[1]).backup(sqlite3.connect(sys.argv[2]))" \
+                    data/music_analytics.db "$backup_dir/music_analytics.db"
+            fi || print_warning "Database backup failed"
+        fi
+        
+        # Archived Parquet months are write-once, so one shared copy only ever gains new files
+        if [ -d data/archive ]; then
+            mkdir -p backups/archive
+            cp -rn data/archive/. backups/archive/ 2>/dev/null || true
+        fi
         
         # Backup reports
         cp -r reports/generated "$backup_dir/" 2>/dev/null || true
@@ -15,6 +15,8 @@ export const useApi = () => {
     try {
       const url = `${API_BASE_URL}${endpoint}`;
       const config = {
+        // Revalidate with the stored ETag; unchanged data comes back as a bodyless 304
+        cache: 'no-cache',
         headers: {
           'Content-Type': 'application/json',
           ...options.headers
@@ -196,6 +198,34 @@ export const useArtistSearch = () => {
   };
 };
 
+// Search-as-you-type completions; cheap enough to call on every keystroke
+export const useSearchSuggestions = () => {
+  const [suggestions, setSuggestions] = useState([]);
+  const [error, setError] = useState(null);
+  const { get } = useApi();
+
+  const suggest = useCallback(async (query, limit = 10) => {
+    if (!query.trim()) {
+      setSuggestions([]);
+      return;
+    }
+
+    try {
+      const response = await get(`/search/suggest?q=${encodeURIComponent(query)}&limit=${limit}`);
+      setSuggestions(response.data);
+      setError(null);
+    } catch (err) {
+      setError(err.message);
+    }
+  }, [get]);
+
+  return {
+    suggestions,
+    error,
+    suggest
+  };
+};
+
 // Custom hook for report generation
 export const useReports = () => {
   const [generatingReport, setGeneratingReport] = useState(false);
@@ -425,6 +455,7 @@ export default {
   usePlatformAnalytics,
   useArtist,
   useArtistSearch,
+  useSearchSuggestions,
   useReports,
   useTimeSeries,
   useLocalStorage,